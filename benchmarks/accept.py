@@ -0,0 +1,112 @@
+"""Measure how many connections per second a server accepts.
+
+A child process opens connections to a server with several threads, each
+waiting for the server to send a byte back before closing the connection and
+opening the next one.
+
+Compares accepting connections from a single watch, several at a time, with
+waiting for a new ``sock_accept()`` future for every connection, which is
+how servers used to be implemented.
+
+Run with::
+
+    $ python benchmarks/accept.py
+"""
+
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+from gbulb.glib_events import GLibEventLoop
+
+# Connecting from another process keeps the clients from competing with the
+# loop for the GIL
+CLIENTS = """
+import socket, sys, threading
+port, count, concurrency = map(int, sys.argv[1:])
+
+def connect(count):
+    for _ in range(count):
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            sock.recv(1)
+
+threads = [
+    threading.Thread(target=connect, args=(count // concurrency,))
+    for _ in range(concurrency)
+]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+"""
+
+
+class AcceptFutureEventLoop(GLibEventLoop):
+    def _start_serving(
+        self, protocol_factory, sock, sslcontext=None, server=None, *args
+    ):
+        def server_loop(f=None):
+            if f is not None:
+                if f.cancelled():
+                    return
+                (conn, addr) = f.result()
+                conn.setblocking(False)
+                self._make_socket_transport(
+                    conn, protocol_factory(), extra={"peername": addr}, server=server
+                )
+            f = self.sock_accept(sock)
+            self._accept_futures[sock] = f
+            f.add_done_callback(server_loop)
+
+        self._accept_futures = {}
+        self.call_soon(server_loop)
+
+    def _stop_serving(self, sock):
+        self._accept_futures.pop(sock).cancel()
+        sock.close()
+
+
+class Greeter(asyncio.Protocol):
+    def connection_made(self, transport):
+        transport.write(b"x")
+        transport.close()
+
+
+async def bench(loop, count, concurrency):
+    server = await loop.create_server(Greeter, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    start = time.perf_counter()
+    clients = subprocess.Popen(
+        [sys.executable, "-c", CLIENTS, str(port), str(count), str(concurrency)]
+    )
+    await loop.run_in_executor(None, clients.wait)
+    elapsed = time.perf_counter() - start
+
+    server.close()
+    await server.wait_closed()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=10_000)
+    args = parser.parse_args()
+
+    for concurrency in [1, 16, 64]:
+        for label, loop_class in [
+            ("sock_accept", AcceptFutureEventLoop),
+            ("watch", GLibEventLoop),
+        ]:
+            loop = loop_class()
+            try:
+                rate = loop.run_until_complete(bench(loop, args.count, concurrency))
+            finally:
+                loop.close()
+            print(f"{concurrency:>3} clients {label:<12} {rate:>10,.0f} conn/s")
+
+
+if __name__ == "__main__":
+    main()
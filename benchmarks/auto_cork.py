@@ -0,0 +1,123 @@
+"""Measure the throughput of a server that writes responses in pieces.
+
+A client sends requests to a server on the same loop and waits for each
+response before sending the next request (or keeps several in flight with
+``--pipeline``). The server writes every response as a status line, a few
+header lines and a body, with a separate ``write()`` call for each of them.
+
+Compares the socket transport's default behaviour, which sends the first
+write of every response right away, with ``set_auto_cork()``, which holds
+all the writes back until ``data_received()`` has returned and sends them
+with a single system call.
+
+Run with::
+
+    $ python benchmarks/auto_cork.py
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+
+from gbulb.glib_events import GLibEventLoop
+
+REQUEST = b"GET / HTTP/1.1\r\n\r\n"
+
+
+def set_nodelay(transport):
+    # Otherwise Nagle's algorithm holds back all but the first write of
+    # every response until the previous packet has been acknowledged
+    sock = transport.get_extra_info("socket")
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class Server(asyncio.Protocol):
+    def __init__(self, body, auto_cork):
+        self.body = body
+        self.auto_cork = auto_cork
+
+    def connection_made(self, transport):
+        self.transport = transport
+        set_nodelay(transport)
+        transport.set_auto_cork(self.auto_cork)
+
+    def data_received(self, data):
+        for _ in range(data.count(REQUEST)):
+            self.transport.write(b"HTTP/1.1 200 OK\r\n")
+            self.transport.write(b"Content-Type: text/plain\r\n")
+            self.transport.write(b"Content-Length: %d\r\n" % len(self.body))
+            self.transport.write(b"\r\n")
+            self.transport.write(self.body)
+
+
+class Client(asyncio.Protocol):
+    def __init__(self, response_size, count, pipeline, done):
+        self.response_size = response_size
+        self.remaining = count
+        self.pipeline = pipeline
+        self.pending = 0
+        self.done = done
+
+    def connection_made(self, transport):
+        self.transport = transport
+        set_nodelay(transport)
+        for _ in range(min(self.pipeline, self.remaining)):
+            self.send()
+
+    def send(self):
+        self.transport.write(REQUEST)
+        self.remaining -= 1
+        self.pending += self.response_size
+
+    def data_received(self, data):
+        self.pending -= len(data)
+        while self.remaining and self.pending < self.pipeline * self.response_size:
+            self.send()
+        if not self.remaining and not self.pending:
+            self.transport.close()
+            self.done.set_result(None)
+
+
+async def bench(loop, size, count, pipeline, auto_cork):
+    body = b"x" * size
+    server = await loop.create_server(lambda: Server(body, auto_cork), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    done = loop.create_future()
+    response_size = len(
+        b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+        b"Content-Length: %d\r\n\r\n" % size
+    ) + len(body)
+
+    start = time.perf_counter()
+    await loop.create_connection(
+        lambda: Client(response_size, count, pipeline, done), "127.0.0.1", port
+    )
+    await done
+    elapsed = time.perf_counter() - start
+
+    server.close()
+    await server.wait_closed()
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=20_000)
+    parser.add_argument("-p", "--pipeline", type=int, default=1)
+    args = parser.parse_args()
+
+    for size in [16, 1024, 16384]:
+        for label, auto_cork in [("default", False), ("auto-cork", True)]:
+            loop = GLibEventLoop()
+            try:
+                rate = loop.run_until_complete(
+                    bench(loop, size, args.count, args.pipeline, auto_cork)
+                )
+            finally:
+                loop.close()
+            print(f"{size:>6}B body {label:<10} {rate:>10,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
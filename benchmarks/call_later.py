@@ -0,0 +1,88 @@
+"""Measure the cost of scheduling and cancelling timers.
+
+Compares the loop's timer heap with allocating a ``GLib.Timeout`` source for
+every timer, which is how ``call_later()`` used to be implemented. The
+schedule-and-cancel pattern is what ``asyncio.wait_for()`` and
+``asyncio.timeout()`` do for every operation that completes in time.
+
+Run with::
+
+    $ python benchmarks/call_later.py
+"""
+
+import argparse
+import time
+
+from gi.repository import GLib
+
+from gbulb.glib_events import GLibEventLoop, GLibHandle
+
+
+def timeout_call_later(loop, delay, callback, *args):
+    loop._check_not_coroutine(callback, "call_later")
+    return GLibHandle(
+        loop=loop,
+        source=GLib.Timeout(delay * 1000),
+        repeat=False,
+        callback=callback,
+        args=args,
+    )
+
+
+def heap_call_later(loop, delay, callback, *args):
+    return loop.call_later(delay, callback, *args)
+
+
+def bench_schedule_cancel(loop, call_later, count):
+    """Schedule `count` timers and cancel each one straight away."""
+    start = time.perf_counter()
+    for _ in range(count):
+        call_later(loop, 60, print).cancel()
+    elapsed = time.perf_counter() - start
+
+    # Give the loop a chance to clean up after the cancelled timers
+    loop.call_soon(loop.stop)
+    loop.run_forever()
+    return count / elapsed
+
+
+def bench_fire(loop, call_later, count):
+    """Schedule `count` timers with spread out deadlines and let them fire."""
+    remaining = count
+
+    def callback():
+        nonlocal remaining
+        remaining -= 1
+        if remaining == 0:
+            loop.stop()
+
+    start = time.perf_counter()
+    for i in range(count):
+        call_later(loop, (i % 100) / 10000, callback)
+    loop.run_forever()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=100_000)
+    args = parser.parse_args()
+
+    for name, bench in [
+        ("schedule+cancel", bench_schedule_cancel),
+        ("fire", bench_fire),
+    ]:
+        for label, call_later in [
+            ("GLib.Timeout", timeout_call_later),
+            ("timer heap", heap_call_later),
+        ]:
+            loop = GLibEventLoop()
+            try:
+                rate = bench(loop, call_later, args.count)
+            finally:
+                loop.close()
+            print(f"{name:>15} {label:<12} {rate:>12,.0f} timers/s")
+
+
+if __name__ == "__main__":
+    main()
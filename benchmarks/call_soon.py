@@ -0,0 +1,86 @@
+"""Measure the throughput of ``loop.call_soon()``.
+
+Compares the loop's batched ready queue with scheduling every callback
+through its own ``GLib.Idle`` source, which is how ``call_soon()`` used to
+be implemented.
+
+Run with::
+
+    $ python benchmarks/call_soon.py
+"""
+
+import argparse
+import time
+
+from gi.repository import GLib
+
+from gbulb.glib_events import GLibEventLoop, GLibHandle
+
+
+def idle_call_soon(loop, callback, *args):
+    source = GLib.Idle()
+    source.set_priority(GLib.PRIORITY_DEFAULT)
+    return GLibHandle(
+        loop=loop, source=source, repeat=False, callback=callback, args=args
+    )
+
+
+def ready_call_soon(loop, callback, *args):
+    return loop.call_soon(callback, *args)
+
+
+def bench_burst(loop, call_soon, count):
+    """Schedule `count` callbacks up front, then run them all."""
+    remaining = count
+
+    def callback():
+        nonlocal remaining
+        remaining -= 1
+        if remaining == 0:
+            loop.stop()
+
+    start = time.perf_counter()
+    for _ in range(count):
+        call_soon(loop, callback)
+    loop.run_forever()
+    return count / (time.perf_counter() - start)
+
+
+def bench_chain(loop, call_soon, count):
+    """Run `count` callbacks that each schedule the next one."""
+    remaining = count
+
+    def callback():
+        nonlocal remaining
+        remaining -= 1
+        if remaining == 0:
+            loop.stop()
+        else:
+            call_soon(loop, callback)
+
+    start = time.perf_counter()
+    call_soon(loop, callback)
+    loop.run_forever()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=200_000)
+    args = parser.parse_args()
+
+    for name, bench in [("burst", bench_burst), ("chain", bench_chain)]:
+        for label, call_soon in [
+            ("GLib.Idle", idle_call_soon),
+            ("ready queue", ready_call_soon),
+        ]:
+            loop = GLibEventLoop()
+            try:
+                rate = bench(loop, call_soon, args.count)
+            finally:
+                loop.close()
+            print(f"{name:>6} {label:<12} {rate:>12,.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Measure the cost of running short blocking calls in an executor.
+
+Awaits ``loop.run_in_executor()`` calls to a function that returns right
+away, one after the other (which measures the round-trip latency) and many
+at a time with ``asyncio.gather()`` (which measures the throughput).
+
+Compares gbulb's ``ThreadPool``, which completes the asyncio futures
+directly and delivers the results of all the jobs that finished in the
+meantime with a single callback, with ``concurrent.futures.ThreadPoolExecutor``,
+whose futures are chained to asyncio futures with a ``call_soon_threadsafe()``
+for every job.
+
+Run with::
+
+    $ python benchmarks/executor.py
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from gbulb import ThreadPool
+from gbulb.glib_events import GLibEventLoop
+
+
+def job():
+    return None
+
+
+async def sequential(loop, executor, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        await loop.run_in_executor(executor, job)
+    return (time.perf_counter() - start) / count * 1000000
+
+
+async def concurrent(loop, executor, count, batch):
+    start = time.perf_counter()
+    for _ in range(count // batch):
+        await asyncio.gather(
+            *[loop.run_in_executor(executor, job) for _ in range(batch)]
+        )
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=20_000)
+    parser.add_argument("-w", "--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    for label, executor_class in [
+        ("ThreadPoolExecutor", ThreadPoolExecutor),
+        ("ThreadPool", ThreadPool),
+    ]:
+        loop = GLibEventLoop()
+        executor = executor_class(max_workers=args.workers)
+        try:
+            latency = loop.run_until_complete(sequential(loop, executor, args.count))
+            rate = loop.run_until_complete(concurrent(loop, executor, args.count, 100))
+        finally:
+            executor.shutdown()
+            loop.close()
+        print(f"{label:<20} {latency:>8.1f} µs/call {rate:>12,.0f} calls/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Measure the cost of creating handles.
+
+Compares creating a ``GLibHandle`` that captures a copy of the current
+context (as user-visible callbacks do) with one that uses the internal
+no-copy context (as gbulb's own I/O watches do). A few context variables are
+set first, so that the copies are not trivially empty. The cost of
+``contextvars.copy_context()`` on its own is reported for reference.
+
+Run with::
+
+    $ python benchmarks/handles.py
+"""
+
+import argparse
+import contextvars
+import time
+
+from gi.repository import GLib
+
+from gbulb.glib_events import _NO_CONTEXT, GLibEventLoop, GLibHandle
+
+VARIABLES = [contextvars.ContextVar(f"var{i}") for i in range(10)]
+
+
+def bench(loop, count, context):
+    sources = [GLib.Idle() for _ in range(count)]
+
+    start = time.perf_counter()
+    for source in sources:
+        GLibHandle(
+            loop=loop,
+            source=source,
+            repeat=False,
+            callback=print,
+            args=(),
+            context=context,
+        ).cancel()
+    return (time.perf_counter() - start) / count * 1000000
+
+
+def bench_copy_context(count):
+    start = time.perf_counter()
+    for _ in range(count):
+        contextvars.copy_context()
+    return (time.perf_counter() - start) / count * 1000000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=100_000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for i, var in enumerate(VARIABLES):
+        var.set(i)
+
+    cost = min(bench_copy_context(args.count) for _ in range(args.repeat))
+    print(f"{'copy_context() alone':<28} {cost:>8.3f} µs")
+
+    for label, context in [
+        ("GLibHandle, copy_context()", None),
+        ("GLibHandle, no context", _NO_CONTEXT),
+    ]:
+        loop = GLibEventLoop()
+        try:
+            cost = min(bench(loop, args.count, context) for _ in range(args.repeat))
+        finally:
+            loop.close()
+        print(f"{label:<28} {cost:>8.3f} µs")
+
+
+if __name__ == "__main__":
+    main()
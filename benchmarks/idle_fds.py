@@ -0,0 +1,99 @@
+"""Measure the cost of a loop iteration with many idle file descriptors.
+
+Registers readers with ``add_reader()`` for a number of (unbound UDP) sockets
+that never become readable, and then times a chain of ``call_soon()`` callbacks, each of
+which takes a full iteration of the loop.
+
+Compares keeping all the readers in a single source that only has GLib poll
+an epoll (or kqueue) selector, with attaching a GLib IO watch for every file
+descriptor, which is how ``add_reader()`` used to be implemented.
+
+Run with::
+
+    $ python benchmarks/idle_fds.py
+"""
+
+import argparse
+import resource
+import socket
+import time
+
+from gi.repository import GLib
+
+from gbulb.glib_events import GLibEventLoop, GLibHandle
+
+
+class WatchEventLoop(GLibEventLoop):
+    def __init__(self):
+        super().__init__()
+        self._readers = {}
+
+    def add_reader(self, fileobj, callback, *args):
+        channel = self._channel_from_socket(fileobj)
+        source = GLib.io_create_watch(
+            channel, GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR | GLib.IO_NVAL
+        )
+        self._readers[fileobj] = GLibHandle(
+            loop=self, source=source, repeat=True, callback=callback, args=args
+        )
+
+    def remove_reader(self, fileobj):
+        self._readers.pop(fileobj).cancel()
+
+
+def bench(loop, count):
+    remaining = count
+
+    def callback():
+        nonlocal remaining
+        remaining -= 1
+        if remaining:
+            loop.call_soon(callback)
+        else:
+            loop.stop()
+
+    loop.call_soon(callback)
+    start = time.perf_counter()
+    loop.run_forever()
+    return (time.perf_counter() - start) / count * 1000000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=2_000)
+    args = parser.parse_args()
+
+    sizes = [0, 100, 1_000, 10_000]
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = max(sizes) + 100
+    if soft < needed:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(needed, hard), hard))
+        soft = min(needed, hard)
+
+    for size in sizes:
+        if size + 100 > soft:
+            print(f"{size:>6} fds: skipped, the file descriptor limit is too low")
+            continue
+        socks = [socket.socket(socket.AF_INET, socket.SOCK_DGRAM) for _ in range(size)]
+        try:
+            for label, loop_class in [
+                ("watches", WatchEventLoop),
+                ("selector", GLibEventLoop),
+            ]:
+                loop = loop_class()
+                try:
+                    for sock in socks:
+                        loop.add_reader(sock, print)
+                    cost = bench(loop, args.count)
+                    for sock in socks:
+                        loop.remove_reader(sock)
+                finally:
+                    loop.close()
+                print(f"{size:>6} fds {label:<10} {cost:>10.1f} µs/iteration")
+        finally:
+            for sock in socks:
+                sock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Measure how connection throughput scales with the number of loops.
+
+A ``MultiLoopServer`` is started with an increasing number of worker
+processes, each running its own loop with its own ``SO_REUSEPORT`` listening
+socket. Client processes open connections to it with several threads each,
+waiting for the server to send a byte back before closing the connection
+and opening the next one.
+
+Run with::
+
+    $ python benchmarks/multi_loop.py
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from gbulb import MultiLoopServer
+
+CLIENTS = """
+import socket, sys, threading
+port, count, concurrency = map(int, sys.argv[1:])
+
+def connect(count):
+    for _ in range(count):
+        with socket.create_connection(("127.0.0.1", port)) as sock:
+            sock.recv(1)
+
+threads = [
+    threading.Thread(target=connect, args=(count // concurrency,))
+    for _ in range(concurrency)
+]
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+"""
+
+
+class Greeter(asyncio.Protocol):
+    def connection_made(self, transport):
+        transport.write(b"x")
+        transport.close()
+
+
+def bench(workers, count, clients, concurrency):
+    with MultiLoopServer(
+        Greeter, "127.0.0.1", 0, workers=workers, processes=True
+    ) as server:
+        port = str(server.address[1])
+        args = [str(count // clients), str(concurrency)]
+
+        start = time.perf_counter()
+        processes = [
+            subprocess.Popen([sys.executable, "-c", CLIENTS, port, *args])
+            for _ in range(clients)
+        ]
+        for process in processes:
+            process.wait()
+        elapsed = time.perf_counter() - start
+
+        stats = server.stats()
+    return stats["accepted"] / elapsed, [w["accepted"] for w in stats["workers"]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=20_000)
+    parser.add_argument("-c", "--clients", type=int, default=4)
+    parser.add_argument("-t", "--concurrency", type=int, default=16)
+    parser.add_argument("-w", "--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    workers = 1
+    while True:
+        rate, spread = bench(workers, args.count, args.clients, args.concurrency)
+        print(f"{workers:>3} workers {rate:>10,.0f} conn/s  per worker: {spread}")
+        if workers >= args.max_workers:
+            break
+        workers = min(workers * 2, args.max_workers)
+
+
+if __name__ == "__main__":
+    main()
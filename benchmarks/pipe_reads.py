@@ -0,0 +1,103 @@
+"""Measure the throughput of reading from a pipe into a buffered protocol.
+
+A child process writes data to its stdout as fast as it can, and the loop
+reads it through ``connect_read_pipe()`` into the buffer of an
+``asyncio.BufferedProtocol``.
+
+Compares reading the pipe with ``os.readv()``, straight into the protocol's
+buffer, with reading it through ``GLib.IOChannel.read()`` and copying the data
+into the protocol's buffer, which is how pipe transports used to be
+implemented.
+
+Run with::
+
+    $ python benchmarks/pipe_reads.py
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+from gbulb import transports
+from gbulb.glib_events import GLibEventLoop
+
+WRITER = """
+import os, sys
+chunk = memoryview(b"x" * 65536)
+for _ in range(int(sys.argv[1])):
+    written = 0
+    while written < len(chunk):
+        written += os.write(1, chunk[written:])
+"""
+
+
+class ChannelPipeReadTransport(transports.PipeReadTransport):
+    def _create_read_future(self, size):
+        if self._alloc_read_buffers:
+            self._read_buffer = self._protocol.get_buffer(size)
+            size = len(self._read_buffer)
+        return self._loop._channel_read(self._channel, size)
+
+
+class ChannelEventLoop(GLibEventLoop):
+    def _make_read_pipe_transport(self, pipe, protocol, waiter=None, extra=None):
+        channel = self._channel_from_fileobj(pipe)
+        return ChannelPipeReadTransport(self, channel, protocol, waiter, extra)
+
+
+class BufferedReader(asyncio.BufferedProtocol):
+    def __init__(self, done, size):
+        self.done = done
+        self.received = 0
+        self.buffer = bytearray(size)
+
+    def get_buffer(self, sizehint):
+        return self.buffer
+
+    def buffer_updated(self, nbytes):
+        self.received += nbytes
+
+    def eof_received(self):
+        self.done.set_result(self.received)
+
+
+async def bench(loop, size, chunks):
+    # The transport takes ownership of the pipe's file descriptor
+    rfd, wfd = os.pipe()
+    writer = subprocess.Popen([sys.executable, "-c", WRITER, str(chunks)], stdout=wfd)
+    os.close(wfd)
+    done = loop.create_future()
+
+    start = time.perf_counter()
+    transport, _ = await loop.connect_read_pipe(lambda: BufferedReader(done, size), rfd)
+    received = await done
+    elapsed = time.perf_counter() - start
+
+    transport.close()
+    await loop.run_in_executor(None, writer.wait)
+    return received / elapsed / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--total", type=int, default=1024, help="MiB per run")
+    args = parser.parse_args()
+
+    for size in [64 * 1024, 256 * 1024]:
+        for label, loop_class in [
+            ("IOChannel", ChannelEventLoop),
+            ("os.readv", GLibEventLoop),
+        ]:
+            loop = loop_class()
+            try:
+                throughput = loop.run_until_complete(bench(loop, size, args.total * 16))
+            finally:
+                loop.close()
+            print(f"{size // 1024:>4}KiB buffer {label:<10} {throughput:>9,.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Measure how a PreforkServer keeps serving while its workers restart.
+
+Client threads open connections to a ``PreforkServer`` as fast as they can,
+waiting for the server to send a byte back before closing the connection and
+opening the next one, while the server replaces its workers with rolling
+restarts. Reports the connection rate and the number of connections that
+failed.
+
+Run with::
+
+    $ python benchmarks/prefork.py
+"""
+
+import argparse
+import asyncio
+import socket
+import threading
+import time
+
+from gi.repository import GLib
+
+from gbulb import PreforkServer
+from gbulb.glib_events import GLibEventLoop
+
+
+class Greeter(asyncio.Protocol):
+    def connection_made(self, transport):
+        transport.write(b"x")
+        transport.close()
+
+
+def connect(address, done, counts):
+    while not done.is_set():
+        try:
+            with socket.create_connection(address, timeout=5) as sock:
+                sock.recv(1)
+            counts[0] += 1
+        except OSError:
+            counts[1] += 1
+
+
+async def bench(workers, restarts, concurrency):
+    loop = asyncio.get_running_loop()
+    async with PreforkServer(Greeter, "127.0.0.1", 0, workers=workers) as server:
+        done = threading.Event()
+        counts = [[0, 0] for _ in range(concurrency)]
+        threads = [
+            threading.Thread(target=connect, args=(server.address, done, c))
+            for c in counts
+        ]
+        for thread in threads:
+            thread.start()
+
+        start = time.perf_counter()
+        for _ in range(restarts):
+            await server.restart()
+        elapsed = time.perf_counter() - start
+
+        done.set()
+        for thread in threads:
+            await loop.run_in_executor(None, thread.join)
+    connected = sum(c[0] for c in counts)
+    failed = sum(c[1] for c in counts)
+    return connected / elapsed, failed, elapsed / restarts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-r", "--restarts", type=int, default=10)
+    parser.add_argument("-t", "--concurrency", type=int, default=8)
+    parser.add_argument("-w", "--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    # The workers are supervised from GLib's global default context
+    loop = GLibEventLoop(context=GLib.main_context_default())
+    try:
+        rate, failed, restart = loop.run_until_complete(
+            bench(args.workers, args.restarts, args.concurrency)
+        )
+    finally:
+        loop.close()
+    print(
+        f"{rate:>10,.0f} conn/s  {failed} failed  "
+        f"{restart * 1000:.1f} ms per rolling restart"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Measure the throughput of sending a file over a socket.
+
+A file is sent over a socket pair, with ``loop.sock_sendfile()`` on the raw
+socket and with ``loop.sendfile()`` on a socket transport, while a child
+process reads it from the other end.
+
+Compares sending the file with ``os.sendfile()`` from a single write watch
+with asyncio's fallback, which reads the file into a buffer in a thread and
+sends the buffer, and (for raw sockets) with asyncio's own ``os.sendfile()``
+implementation, which goes through ``add_writer()`` after every chunk.
+
+Run with::
+
+    $ python benchmarks/sendfile.py
+"""
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from asyncio import unix_events
+
+from gbulb.glib_events import GLibEventLoop
+
+# Reading in another process keeps the reader from competing with the loop
+# for the GIL
+DRAIN = """
+import sys
+print("ready", flush=True)
+buf = bytearray(1024 * 1024)
+while sys.stdin.buffer.raw.readinto(buf):
+    pass
+"""
+
+
+async def sock_fallback(loop, sock, file):
+    await loop._sock_sendfile_fallback(sock, file, 0, None)
+
+
+async def sock_add_writer(loop, sock, file):
+    await unix_events._UnixSelectorEventLoop._sock_sendfile_native(
+        loop, sock, file, 0, None
+    )
+
+
+async def sock_watch(loop, sock, file):
+    await loop.sock_sendfile(sock, file, fallback=False)
+
+
+async def transport_fallback(loop, sock, file):
+    transport, _ = await loop.connect_accepted_socket(asyncio.Protocol, sock)
+    await loop._sendfile_fallback(transport, file, 0, None)
+    transport.close()
+
+
+async def transport_native(loop, sock, file):
+    transport, _ = await loop.connect_accepted_socket(asyncio.Protocol, sock)
+    await loop.sendfile(transport, file, fallback=False)
+    transport.close()
+
+
+async def bench(loop, send, file, size):
+    rsock, wsock = socket.socketpair()
+    wsock.setblocking(False)
+    reader = subprocess.Popen(
+        [sys.executable, "-c", DRAIN], stdin=rsock, stdout=subprocess.PIPE
+    )
+    rsock.close()
+    reader.stdout.readline()
+
+    file.seek(0)
+    start = time.perf_counter()
+    await send(loop, wsock, file)
+    wsock.close()
+    await loop.run_in_executor(None, reader.wait)
+    elapsed = time.perf_counter() - start
+
+    return size / elapsed / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--size", type=int, default=256, help="file size in MiB")
+    args = parser.parse_args()
+
+    size = args.size * 1024 * 1024
+    with tempfile.TemporaryFile() as file:
+        chunk = b"x" * 1024 * 1024
+        for _ in range(args.size):
+            file.write(chunk)
+        file.flush()
+
+        for name, send in [
+            ("sock_sendfile() fallback", sock_fallback),
+            ("sock_sendfile() add_writer", sock_add_writer),
+            ("sock_sendfile() watch", sock_watch),
+            ("sendfile() fallback", transport_fallback),
+            ("sendfile() native", transport_native),
+        ]:
+            loop = GLibEventLoop()
+            try:
+                throughput = loop.run_until_complete(bench(loop, send, file, size))
+            finally:
+                loop.close()
+            print(f"{name:<28} {throughput:>9,.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
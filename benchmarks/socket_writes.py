@@ -0,0 +1,129 @@
+"""Measure the throughput of socket transport writes.
+
+A protocol writes data as fast as the transport's flow control allows, while
+a child process reads it from the other end of a socket pair. Covers many small
+``write()`` calls, the same data passed to ``writelines()`` in batches, and
+large payloads.
+
+Compares the socket transport's write queue, which holds large payloads
+without copying them and is flushed with ``sendmsg()``, with copying all
+pending data into a single ``bytearray`` and sending it through
+``sock_sendall()``, which is what the ``transport_engine="futures"`` engine
+does.
+
+Run with::
+
+    $ python benchmarks/socket_writes.py
+"""
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+
+from gbulb import transports
+from gbulb.glib_events import GLibEventLoop
+
+
+class Writer(asyncio.Protocol):
+    def __init__(self, chunk, count, batch, done):
+        self.chunk = chunk
+        self.remaining = count
+        self.batch = batch
+        self.paused = False
+        self.done = done
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.write_more()
+
+    def connection_lost(self, exc):
+        self.done.set_result(None)
+
+    def pause_writing(self):
+        self.paused = True
+
+    def resume_writing(self):
+        self.paused = False
+        self.write_more()
+
+    def write_more(self):
+        while self.remaining and not self.paused:
+            if self.batch > 1:
+                count = min(self.batch, self.remaining)
+                self.transport.writelines([self.chunk] * count)
+            else:
+                count = 1
+                self.transport.write(self.chunk)
+            self.remaining -= count
+
+        if not self.remaining:
+            self.transport.close()
+
+
+# Reading in another process keeps the reader from competing with the loop
+# for the GIL
+DRAIN = """
+import sys
+print("ready", flush=True)
+buf = bytearray(1024 * 1024)
+while sys.stdin.buffer.raw.readinto(buf):
+    pass
+"""
+
+
+async def bench(loop, transport_class, size, count, batch):
+    rsock, wsock = socket.socketpair()
+    reader = subprocess.Popen(
+        [sys.executable, "-c", DRAIN], stdin=rsock, stdout=subprocess.PIPE
+    )
+    rsock.close()
+    reader.stdout.readline()
+
+    done = loop.create_future()
+    protocol = Writer(b"x" * size, count, batch, done)
+
+    start = time.perf_counter()
+    if transport_class is None:
+        await loop.connect_accepted_socket(lambda: protocol, wsock)
+    else:
+        wsock.setblocking(False)
+        transport_class(loop, wsock, protocol)
+    await done
+    await loop.run_in_executor(None, reader.wait)
+    elapsed = time.perf_counter() - start
+
+    return count * size / elapsed / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--total", type=int, default=256, help="MiB per run")
+    args = parser.parse_args()
+
+    total = args.total * 1024 * 1024
+    for name, size, batch in [
+        ("write() 64B", 64, 1),
+        ("writelines() 64x64B", 64, 64),
+        ("write() 1MiB", 1024 * 1024, 1),
+    ]:
+        # Small writes are slow enough with any implementation
+        count = total // size // (4 if size < 1024 else 1)
+        for label, transport_class in [
+            ("bytearray", transports.FutureSocketTransport),
+            ("sendmsg", None),
+        ]:
+            loop = GLibEventLoop()
+            try:
+                throughput = loop.run_until_complete(
+                    bench(loop, transport_class, size, count, batch)
+                )
+            finally:
+                loop.close()
+            print(f"{name:>20} {label:<10} {throughput:>9,.1f} MiB/s")
+
+
+if __name__ == "__main__":
+    main()
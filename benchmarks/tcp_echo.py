@@ -0,0 +1,99 @@
+"""Measure the throughput of a TCP echo server and client.
+
+A client sends messages to an echo server on the same loop and waits for
+each message to come back before sending the next one (or keeps several in
+flight with ``--pipeline``). Both ends use plain ``asyncio.Protocol``
+instances, so the numbers mostly reflect the cost of the transports.
+
+Compares the two socket transport engines a loop can be created with: the
+default ``transport_engine="readiness"``, which reads and writes from
+persistent I/O watches, and ``transport_engine="futures"``, which reads and
+writes every chunk through ``sock_recv()`` and ``sock_sendall()`` futures.
+
+Run with::
+
+    $ python benchmarks/tcp_echo.py
+"""
+
+import argparse
+import asyncio
+import time
+
+from gbulb.glib_events import GLibEventLoop
+
+
+class EchoServer(asyncio.Protocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.transport.write(data)
+
+
+class EchoClient(asyncio.Protocol):
+    def __init__(self, message, count, pipeline, done):
+        self.message = message
+        self.remaining = count
+        self.pipeline = pipeline
+        self.pending = 0
+        self.done = done
+
+    def connection_made(self, transport):
+        self.transport = transport
+        for _ in range(min(self.pipeline, self.remaining)):
+            self.send()
+
+    def send(self):
+        self.transport.write(self.message)
+        self.remaining -= 1
+        self.pending += len(self.message)
+
+    def data_received(self, data):
+        self.pending -= len(data)
+        while self.remaining and self.pending < self.pipeline * len(self.message):
+            self.send()
+        if not self.remaining and not self.pending:
+            self.transport.close()
+            self.done.set_result(None)
+
+
+async def bench(loop, size, count, pipeline):
+    server = await loop.create_server(EchoServer, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    done = loop.create_future()
+
+    start = time.perf_counter()
+    await loop.create_connection(
+        lambda: EchoClient(b"x" * size, count, pipeline, done), "127.0.0.1", port
+    )
+    await done
+    elapsed = time.perf_counter() - start
+
+    server.close()
+    await server.wait_closed()
+    return count / elapsed, count * size / elapsed / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=20_000)
+    parser.add_argument("-p", "--pipeline", type=int, default=1)
+    args = parser.parse_args()
+
+    for size in [64, 4096, 65536]:
+        for engine in ["futures", "readiness"]:
+            loop = GLibEventLoop(transport_engine=engine)
+            try:
+                rate, throughput = loop.run_until_complete(
+                    bench(loop, size, args.count, args.pipeline)
+                )
+            finally:
+                loop.close()
+            print(
+                f"{size:>6}B {engine:<12} {rate:>10,.0f} msg/s"
+                f" {throughput:>9,.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Measure how fast other threads can hand callbacks over to the loop.
+
+Several producer threads queue callbacks with ``call_soon_threadsafe()`` as
+fast as they can (for instance to deliver results computed by workers),
+while the loop runs them in batches.
+
+Compares queueing them without any lock and waking up the loop at most once
+per iteration with ``GLib.MainContext.wakeup()``, with ``call_soon()``, which
+``call_soon_threadsafe()`` used to be an alias of, and which re-arms the
+loop's callback source with ``set_ready_time()`` (taking the context's lock)
+whenever the queue was empty.
+
+Run with::
+
+    $ python benchmarks/threadsafe.py
+"""
+
+import argparse
+import threading
+import time
+
+from gbulb.glib_events import GLibEventLoop
+
+
+class CountingEventLoop(GLibEventLoop):
+    def __init__(self):
+        self.batches = 0
+        super().__init__()
+
+    def _run_callbacks(self):
+        self.batches += 1
+        super()._run_callbacks()
+
+
+class AliasEventLoop(CountingEventLoop):
+    call_soon_threadsafe = GLibEventLoop.call_soon
+
+
+def bench(loop, producers, count):
+    total = producers * count
+    received = 0
+
+    def callback():
+        nonlocal received
+        received += 1
+        if received == total:
+            loop.stop()
+
+    def produce():
+        for _ in range(count):
+            loop.call_soon_threadsafe(callback)
+
+    threads = [threading.Thread(target=produce) for _ in range(producers)]
+    start = time.perf_counter()
+    loop.call_soon(lambda: [thread.start() for thread in threads])
+    loop.run_forever()
+    elapsed = time.perf_counter() - start
+    for thread in threads:
+        thread.join()
+    return total / elapsed, total / loop.batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-n", "--count", type=int, default=100_000, help="callbacks in total"
+    )
+    args = parser.parse_args()
+
+    for producers in [1, 4, 16]:
+        for label, loop_class in [
+            ("call_soon", AliasEventLoop),
+            ("queue", CountingEventLoop),
+        ]:
+            loop = loop_class()
+            try:
+                rate, batch = bench(loop, producers, args.count // producers)
+            finally:
+                loop.close()
+            print(
+                f"{producers:>3} producers {label:<10} {rate:>12,.0f} callbacks/s"
+                f" {batch:>8,.1f} callbacks/batch"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measure how precisely timers fire.
+
+For each delay, a chain of timers is run where every timer schedules the
+next one, and the difference between the time a callback actually ran and
+its deadline is recorded. Negative values mean the timer fired early.
+
+Compares the loop's timers (backed by GLib ready times, in microseconds)
+with ``GLib.Timeout`` sources (in milliseconds), which is how
+``call_later()`` used to be implemented.
+
+Run with::
+
+    $ python benchmarks/timer_latency.py
+"""
+
+import argparse
+import statistics
+
+from gi.repository import GLib
+
+from gbulb.glib_events import GLibEventLoop, GLibHandle
+
+
+def timeout_call_later(loop, delay, callback, *args):
+    return GLibHandle(
+        loop=loop,
+        source=GLib.Timeout(delay * 1000) if delay > 0 else GLib.Idle(),
+        repeat=False,
+        callback=callback,
+        args=args,
+    )
+
+
+def ready_time_call_later(loop, delay, callback, *args):
+    return loop.call_later(delay, callback, *args)
+
+
+def bench(loop, call_later, delay, count):
+    """Return the lateness of `count` timers of `delay` seconds, in µs."""
+    lateness = []
+
+    def callback(when):
+        lateness.append((loop.time() - when) * 1000000)
+        if len(lateness) == count:
+            loop.stop()
+        else:
+            call_later(loop, delay, callback, loop.time() + delay)
+
+    call_later(loop, delay, callback, loop.time() + delay)
+    loop.run_forever()
+    return lateness
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--count", type=int, default=500)
+    args = parser.parse_args()
+
+    print(
+        f"{'delay':>8} {'timer':<12} {'early':>6} {'min µs':>9}"
+        f" {'median µs':>10} {'p99 µs':>9} {'max µs':>9}"
+    )
+    for delay in [0.0001, 0.001, 0.01]:
+        # Fewer iterations for long delays, to keep the total run time sane
+        count = max(10, min(args.count, int(5 / delay / 100)))
+        for label, call_later in [
+            ("GLib.Timeout", timeout_call_later),
+            ("ready time", ready_time_call_later),
+        ]:
+            loop = GLibEventLoop()
+            try:
+                lateness = sorted(bench(loop, call_later, delay, count))
+            finally:
+                loop.close()
+
+            early = sum(1 for value in lateness if value < 0)
+            p99 = lateness[min(len(lateness) - 1, int(len(lateness) * 0.99))]
+            print(
+                f"{delay * 1000:>6g}ms {label:<12} {early:>6}"
+                f" {lateness[0]:>9.1f} {statistics.median(lateness):>10.1f}"
+                f" {p99:>9.1f} {lateness[-1]:>9.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
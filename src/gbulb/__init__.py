@@ -1,4 +1,6 @@
+from .executor import *  # noqa: F401,F403
 from .glib_events import *  # noqa: F401,F403
+from .servers import *  # noqa: F401,F403
 from .utils import *  # noqa: F401,F403
 
 __all__ = [
@@ -0,0 +1,128 @@
+import os
+import queue
+import threading
+from asyncio import CancelledError
+from concurrent import futures
+
+__all__ = ["ThreadPool"]
+
+
+def _run_submitted(future, fn, args, kwargs):
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        result = fn(*args, **kwargs)
+    except BaseException as exc:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
+
+
+class ThreadPool(futures.Executor):
+    """Thread pool that hands results straight back to the loop.
+
+    This is the default executor of gbulb's event loops. Jobs submitted by
+    `loop.run_in_executor()` complete an asyncio future directly, without
+    going through a `concurrent.futures.Future`. The results of all the jobs
+    that finished since the loop last came around are delivered by a single
+    callback, and wake the loop up at most once.
+
+    It can also be used like any other executor, and be shared by several
+    loops. Worker threads are started as needed, up to `max_workers`.
+    """
+
+    def __init__(self, max_workers=None, thread_name_prefix=""):
+        if max_workers is None:
+            # The same default as `concurrent.futures.ThreadPoolExecutor`
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        if max_workers <= 0:
+            raise ValueError("max_workers must be greater than 0")
+
+        self._max_workers = max_workers
+        self._thread_name_prefix = thread_name_prefix or f"ThreadPool-{id(self):x}"
+        self._jobs = queue.SimpleQueue()
+        self._idle = threading.Semaphore(0)
+        self._threads = set()
+        self._shutdown = False
+        self._shutdown_lock = threading.Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = futures.Future()
+        self._put_job(_run_submitted, (future, fn, args, kwargs), None, None)
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        with self._shutdown_lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        job = self._jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is None:
+                        continue
+                    func, args, complete, token = job
+                    if complete is None:
+                        args[0].cancel()
+                    else:
+                        complete(token, None, CancelledError())
+            # Wakes up the workers one after the other
+            self._jobs.put(None)
+
+        if wait:
+            for thread in list(self._threads):
+                thread.join()
+
+    def _put_job(self, func, args, complete, token):
+        """Queue a call to `func(*args)`.
+
+        Once it has returned, `complete(token, result, exception)` is called
+        from the worker thread, unless `complete` is None. Jobs with a
+        `token` that has been cancelled in the meantime are skipped.
+        """
+        with self._shutdown_lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._jobs.put((func, args, complete, token))
+            self._adjust_thread_count()
+
+    def _adjust_thread_count(self):
+        # Reuse an idle worker if there is one
+        if self._idle.acquire(timeout=0):
+            return
+
+        if len(self._threads) < self._max_workers:
+            thread = threading.Thread(
+                name=f"{self._thread_name_prefix}_{len(self._threads)}",
+                target=self._worker,
+                daemon=True,
+            )
+            thread.start()
+            self._threads.add(thread)
+
+    def _worker(self):
+        jobs = self._jobs
+        idle = self._idle
+        while True:
+            job = jobs.get()
+            if job is None:
+                # Let the next worker know
+                jobs.put(None)
+                return
+
+            func, args, complete, token = job
+            if complete is None:
+                func(*args)
+            elif not token.cancelled():
+                try:
+                    result = func(*args)
+                except BaseException as exc:
+                    complete(token, None, exc)
+                else:
+                    complete(token, result, None)
+                    result = None
+
+            # Don't keep the arguments and the result alive while idle
+            job = func = args = complete = token = None
+            idle.release()
@@ -1,14 +1,22 @@
 """PEP 3156 event loop based on GLib."""
 
 import asyncio
+import atexit
+import collections
+import contextvars
+import errno
+import heapq
+import io
+import math
 import os
+import selectors
 import signal
 import socket
 import sys
 import threading
 import warnings
 import weakref
-from asyncio import CancelledError, constants, events, sslproto, tasks
+from asyncio import CancelledError, constants, events, exceptions, sslproto, tasks
 
 try:
     from gi.repository import Gio, GLib
@@ -16,8 +24,13 @@ except ImportError:  # pragma: no cover
     GLib = None
     Gio = None
 
+if GLib is not None:
+    _Source = GLib.Source
+else:  # pragma: no cover
+    _Source = object
 
 from . import transports
+from .executor import ThreadPool
 
 if hasattr(os, "set_blocking"):
 
@@ -40,6 +53,15 @@ else:
 
 __all__ = ["GLibEventLoop", "GLibEventLoopPolicy"]
 
+# Cancelled timers are only purged from the timer heap in bulk once there
+# are at least this many timers, and this fraction of them is cancelled
+# (the same thresholds as asyncio's own event loop).
+_MIN_SCHEDULED_TIMER_HANDLES = 100
+_MIN_CANCELLED_TIMER_HANDLES_FRACTION = 0.5
+
+# Maximum number of bytes passed to a single `GLib.IOChannel.write()` call
+_CHANNEL_WRITE_SIZE = 64 * 1024
+
 
 # The Windows `asyncio` implementation doesn't actually use this, but
 # `glib` abstracts so nicely over this that we can use it on any platform
@@ -143,17 +165,30 @@ with warnings.catch_warnings():
             callback(pid, returncode, *args)
 
 
+class _NoContext:
+    """Stand-in for a `contextvars.Context` used by internal handles.
+
+    Handles normally run their callback in a copy of the context that was
+    current when they were created. Callbacks that are internal to gbulb
+    don't use any context variables, so handles created with this object
+    as their context skip the copy and run their callback directly.
+    """
+
+    __slots__ = ()
+
+    def run(self, callback, *args):
+        return callback(*args)
+
+
+_NO_CONTEXT = _NoContext()
+
+
 class GLibHandle(events.Handle):
-    __slots__ = ("_source", "_repeat", "_context")
+    __slots__ = ("_source", "_repeat")
 
     def __init__(self, *, loop, source, repeat, callback, args, context=None):
-        super().__init__(callback, args, loop)
+        super().__init__(callback, args, loop, context)
 
-        if sys.version_info[:2] >= (3, 7) and context is None:
-            import contextvars
-
-            context = contextvars.copy_context()
-        self._context = context
         self._source = source
         self._repeat = repeat
         loop._handlers.add(self)
@@ -171,6 +206,8 @@ class GLibHandle(events.Handle):
         # Otherwise what happens is the loop is started recursively, but the
         # callbacks don't finish firing, so they can't be rescheduled.
         self._run()
+        if self._loop._after_dispatch:
+            self._loop._run_after_dispatch()
         if not self._repeat:
             self._source.destroy()
             self._loop._handlers.discard(self)
@@ -178,15 +215,238 @@ class GLibHandle(events.Handle):
         return self._repeat
 
 
+class _CustomSource(_Source):
+    """Base class for gbulb's own long-lived GSources."""
+
+    _instances = weakref.WeakSet()
+
+    def __init__(self):
+        super().__init__()
+        self._released = False
+        self._instances.add(self)
+
+    def destroy(self):
+        if not self._released:
+            super().destroy()
+
+    def _release(self):
+        """Destroy the source and free the underlying GSource right away.
+
+        PyGObject frees custom sources when their Python wrapper is garbage
+        collected, which does not work anymore for wrappers that survive
+        until the interpreter shuts down (such as the ones belonging to
+        loops that are never closed). This is called for all remaining
+        sources from an exit handler instead.
+        """
+        self.destroy()
+        self._released = True
+        self._clear_boxed()
+
+
+@atexit.register
+def _release_custom_sources():
+    for source in list(_CustomSource._instances):
+        source._release()
+
+
+class _ReadyTimeSource(_CustomSource):
+    """Custom GSource that is only ever dispatched through its ready time.
+
+    GLib's `Idle` and `Timeout` sources are single-use: a new one has to be
+    allocated and attached to the context for every callback. This source is
+    attached once and then re-armed with `set_ready_time()`, where 0 means
+    "dispatch as soon as possible" and -1 disarms it. Arming it is
+    thread-safe and wakes up the context if it is blocked in poll().
+    """
+
+    def __init__(self, callback):
+        super().__init__()
+        self._callback = callback
+
+    def prepare(self):
+        return (False, -1)
+
+    def check(self):
+        return False
+
+    def dispatch(self, callback, args):
+        self._callback()
+        return GLib.SOURCE_CONTINUE
+
+
+class _CallbackSource(_ReadyTimeSource):
+    """`_ReadyTimeSource` that is also dispatched while `pending` is not empty.
+
+    Other threads append to `pending` and then wake up the context with
+    `GLib.MainContext.wakeup()`, which unlike `set_ready_time()` does not take
+    the context's lock. They only have to do so if `wakeup_pending` is not
+    set already: it is cleared at the start of every iteration, before
+    `pending` is looked at, so a wake-up can never get lost.
+    """
+
+    def __init__(self, callback):
+        super().__init__(callback)
+        self.pending = collections.deque()
+        self.wakeup_pending = False
+
+    def prepare(self):
+        self.wakeup_pending = False
+        return (bool(self.pending), -1)
+
+    def check(self):
+        return bool(self.pending)
+
+
+class _DeadlineSource(_CustomSource):
+    """Custom GSource that wakes up the context once `deadline` has passed.
+
+    The deadline is in microseconds of GLib's monotonic clock, or -1 when the
+    source is disarmed. Unlike `set_ready_time()`, changing it does not wake
+    up the context, so the thread that is about to iterate the context can
+    re-arm it without causing a spurious wake-up. It is not thread-safe.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.deadline = -1
+
+    def prepare(self):
+        if self.deadline < 0:
+            return (False, -1)
+        remaining = self.deadline - self.get_time()
+        if remaining <= 0:
+            return (True, 0)
+        # Round up, so that poll() never returns before the deadline
+        return (False, (remaining + 999) // 1000)
+
+    def check(self):
+        return 0 <= self.deadline <= self.get_time()
+
+    def dispatch(self, callback, args):
+        self.deadline = -1
+        return GLib.SOURCE_CONTINUE
+
+
+class _FdSource(_CustomSource):
+    """Custom GSource that dispatches the callbacks of all the file
+    descriptors registered with the given selector.
+
+    Rather than attaching a GSource (and having GLib poll a file descriptor)
+    for every watched file descriptor, GLib only polls the selector's own
+    file descriptor (an epoll or kqueue instance), which becomes readable
+    whenever any of the file descriptors registered with it is ready. The
+    cost of adding or removing a file descriptor, and of an iteration of the
+    context, therefore does not depend on how many are being watched.
+
+    The data of every selector key is a `(reader, writer)` tuple of handles.
+    """
+
+    def __init__(self, selector):
+        super().__init__()
+        self._selector = selector
+        self.add_unix_fd(selector.fileno(), GLib.IO_IN)
+
+    def prepare(self):
+        return (False, -1)
+
+    def check(self):
+        # GLib considers the source ready when its file descriptor is
+        return False
+
+    def dispatch(self, callback, args):
+        for key, mask in self._selector.select(0):
+            (reader, writer) = key.data
+            if mask & selectors.EVENT_READ and reader is not None:
+                if not reader._cancelled:
+                    reader._run()
+            if mask & selectors.EVENT_WRITE and writer is not None:
+                if not writer._cancelled:
+                    writer._run()
+        return GLib.SOURCE_CONTINUE
+
+
+def _ready_time(when):
+    """Convert a `loop.time()` value to a GLib ready time.
+
+    Ready times are in microseconds of GLib's monotonic clock. Rounding up
+    ensures that the source never becomes ready before `when`; GLib itself
+    rounds the resulting poll() timeout up to the next millisecond.
+    """
+    return math.ceil(when * 1000000)
+
+
+# Errors of `accept()` after which accepting is retried later on
+_ACCEPT_RESOURCE_ERRNOS = (errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM)
+
+
+def _server_connections(server):
+    """Return the number of connections attached to an `asyncio.Server`."""
+    if sys.version_info < (3, 13):
+        return server._active_count
+    else:
+        return len(server._clients)
+
+
 if sys.platform == "win32":
 
     class GLibBaseEventLoopPlatformExt:
         def __init__(self):
-            pass
+            self._readers = {}
+            self._writers = {}
 
         def close(self):
             pass
 
+        def add_reader(self, fileobj, callback, *args):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+
+            self.remove_reader(fd)
+            channel = self._channel_from_socket(fd)
+            source = GLib.io_create_watch(
+                channel, GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR | GLib.IO_NVAL
+            )
+
+            assert fd not in self._readers
+            self._readers[fd] = GLibHandle(
+                loop=self, source=source, repeat=True, callback=callback, args=args
+            )
+
+        def remove_reader(self, fileobj):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+
+            try:
+                self._readers.pop(fd).cancel()
+                return True
+            except KeyError:
+                return False
+
+        def add_writer(self, fileobj, callback, *args):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+
+            self.remove_writer(fd)
+            channel = self._channel_from_socket(fd)
+            source = GLib.io_create_watch(
+                channel, GLib.IO_OUT | GLib.IO_ERR | GLib.IO_NVAL
+            )
+
+            assert fd not in self._writers
+            self._writers[fd] = GLibHandle(
+                loop=self, source=source, repeat=True, callback=callback, args=args
+            )
+
+        def remove_writer(self, fileobj):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+
+            try:
+                self._writers.pop(fd).cancel()
+                return True
+            except KeyError:
+                return False
+
 else:
     from asyncio import unix_events
 
@@ -203,10 +463,19 @@ else:
             self._sighandlers = {}
             self._unix_server_sockets = {}
 
+            self._fd_selector = None
+            self._fd_source = None
+            # Watches of the file descriptors that the selector can't poll
+            self._fd_watches = {}
+
         def close(self):
             for sig in list(self._sighandlers):
                 self.remove_signal_handler(sig)
 
+            if self._fd_source is not None:
+                self._fd_source.destroy()
+                self._fd_selector.close()
+
         def add_signal_handler(self, sig, callback, *args):
             self.remove_signal_handler(sig)
 
@@ -233,6 +502,146 @@ else:
             except KeyError:
                 return False
 
+        async def create_unix_server(
+            self,
+            protocol_factory,
+            path=None,
+            *,
+            max_connections=None,
+            start_serving=True,
+            **kwargs,
+        ):
+            """Create a Unix domain socket server, like
+            `asyncio.loop.create_unix_server()`.
+
+            See `GLibBaseEventLoop.create_server()` for `max_connections`.
+            """
+            self._check_max_connections(max_connections)
+            server = await super().create_unix_server(
+                protocol_factory, path, start_serving=False, **kwargs
+            )
+            return await self._start_server(server, max_connections, start_serving)
+
+        # The callbacks of `add_reader()` and `add_writer()` are all kept in
+        # the selector of a single source (see `_FdSource`), like asyncio's
+        # own event loop does. File descriptors that the selector refuses
+        # (epoll can't poll regular files) get a GLib watch of their own.
+        def add_reader(self, fileobj, callback, *args):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+            self._add_fd_handle(fd, selectors.EVENT_READ, callback, args)
+
+        def remove_reader(self, fileobj):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+            return self._remove_fd_handle(fd, selectors.EVENT_READ)
+
+        def add_writer(self, fileobj, callback, *args):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+            self._add_fd_handle(fd, selectors.EVENT_WRITE, callback, args)
+
+        def remove_writer(self, fileobj):
+            fd = self._fileobj_to_fd(fileobj)
+            self._ensure_fd_no_transport(fd)
+            return self._remove_fd_handle(fd, selectors.EVENT_WRITE)
+
+        def _add_fd_handle(self, fd, event, callback, args):
+            if fd in self._fd_watches:
+                self._add_fd_watch(fd, event, callback, args)
+                return
+
+            if self._fd_source is None:
+                # Attaching a source with a file descriptor wakes up the
+                # context, so only do so once it is actually needed
+                self._fd_selector = selectors.DefaultSelector()
+                self._fd_source = _FdSource(self._fd_selector)
+                # Like with the watch of every file descriptor it replaces,
+                # callbacks must keep firing from nested main loops
+                self._fd_source.set_can_recurse(True)
+                self._fd_source.attach(self._context)
+
+            try:
+                key = self._fd_selector.get_key(fd)
+            except KeyError:
+                mask, handles = 0, (None, None)
+            else:
+                mask, handles = key.events, key.data
+
+            handle = events.Handle(callback, args, self, None)
+            (reader, writer) = handles
+            if event == selectors.EVENT_READ:
+                (previous, handles) = (reader, (handle, writer))
+            else:
+                (previous, handles) = (writer, (reader, handle))
+
+            if mask:
+                self._fd_selector.modify(fd, mask | event, handles)
+            else:
+                try:
+                    self._fd_selector.register(fd, event, handles)
+                except PermissionError:
+                    self._fd_watches[fd] = {}
+                    self._add_fd_watch(fd, event, callback, args)
+                    return
+            if previous is not None:
+                previous.cancel()
+
+        def _add_fd_watch(self, fd, event, callback, args):
+            watches = self._fd_watches[fd]
+            previous = watches.pop(event, None)
+            if previous is not None:
+                previous.cancel()
+
+            channel = self._channel_from_socket(fd)
+            if event == selectors.EVENT_READ:
+                condition = GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR | GLib.IO_NVAL
+            else:
+                condition = GLib.IO_OUT | GLib.IO_ERR | GLib.IO_NVAL
+            watches[event] = GLibHandle(
+                loop=self,
+                source=GLib.io_create_watch(channel, condition),
+                repeat=True,
+                callback=callback,
+                args=args,
+            )
+
+        def _remove_fd_handle(self, fd, event):
+            if fd in self._fd_watches:
+                watches = self._fd_watches[fd]
+                handle = watches.pop(event, None)
+                if not watches:
+                    del self._fd_watches[fd]
+                if handle is None:
+                    return False
+                handle.cancel()
+                return True
+
+            if self._fd_selector is None:
+                return False
+
+            try:
+                key = self._fd_selector.get_key(fd)
+            except KeyError:
+                return False
+
+            (reader, writer) = key.data
+            if event == selectors.EVENT_READ:
+                (handle, handles) = (reader, (None, writer))
+            else:
+                (handle, handles) = (writer, (reader, None))
+
+            mask = key.events & ~event
+            if mask:
+                self._fd_selector.modify(fd, mask, handles)
+            else:
+                self._fd_selector.unregister(fd)
+
+            if handle is None:
+                return False
+            handle.cancel()
+            return True
+
 
 class _BaseEventLoop(asyncio.BaseEventLoop):
     """Extra inheritance step that needs to be inserted so that we only ever
@@ -252,30 +661,55 @@ class _BaseEventLoop(asyncio.BaseEventLoop):
 
 
 class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
-    def __init__(self, context=None):
+    # The socket transport classes that can be picked with the
+    # `transport_engine` argument of the loop
+    _transport_engines = {
+        "readiness": transports.SocketTransport,
+        "futures": transports.FutureSocketTransport,
+    }
+
+    def __init__(self, context=None, transport_engine="readiness"):
+        try:
+            self._socket_transport_class = self._transport_engines[transport_engine]
+        except KeyError:
+            # Nothing has been set up yet, so there is nothing to close
+            self._closed = True
+            raise ValueError(
+                f"transport_engine must be one of {', '.join(self._transport_engines)},"
+                f" not {transport_engine!r}"
+            ) from None
+
         self._handlers = set()
 
-        self._accept_futures = {}
+        self._accept_handles = {}
+        self._accept_args = {}
+        self._max_connections = weakref.WeakKeyDictionary()
         self._context = context or GLib.MainContext()
         self._selector = self
         self._transports = weakref.WeakValueDictionary()
-        self._readers = {}
-        self._writers = {}
 
         self._channels = weakref.WeakValueDictionary()
+        self._select_source = None
+        self._after_dispatch = []
+        self._executor_results = collections.deque()
+        self._executor_delivery_pending = False
 
         _BaseEventLoop.__init__(self)
         GLibBaseEventLoopPlatformExt.__init__(self)
 
     def close(self):
-        for future in self._accept_futures.values():
-            future.cancel()
-        self._accept_futures.clear()
+        for handle in self._accept_handles.values():
+            handle.cancel()
+        self._accept_handles.clear()
+        self._accept_args.clear()
 
         for s in list(self._handlers):
             s.cancel()
         self._handlers.clear()
 
+        if self._select_source is not None:
+            self._select_source.destroy()
+
         GLibBaseEventLoopPlatformExt.close(self)
         _BaseEventLoop.close(self)
 
@@ -287,28 +721,103 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
             elif timeout <= 0:
                 self._context.iteration(False)
             else:
-                # Schedule fake callback that will trigger an event and cause the loop to terminate
-                # after the given number of seconds
-                handle = GLibHandle(
-                    loop=self,
-                    source=GLib.Timeout(timeout * 1000),
-                    repeat=False,
-                    callback=lambda: None,
-                    args=(),
+                # Arm a source that wakes up the context once the timeout has
+                # passed, so that the iteration cannot block for any longer.
+                # The same source is reused for every call, so stepping the
+                # loop like this does not allocate anything.
+                if self._select_source is None:
+                    self._select_source = _DeadlineSource()
+                    self._select_source.attach(self._context)
+                self._select_source.deadline = GLib.get_monotonic_time() + math.ceil(
+                    timeout * 1000000
                 )
                 try:
                     self._context.iteration(True)
                 finally:
-                    handle.cancel()
+                    self._select_source.deadline = -1
             return ()  # Available events are dispatched immediately and not returned
         finally:
             self._context.release()
 
+    def _call_after_dispatch(self, callback):
+        """Call `callback` once the source being dispatched has finished.
+
+        This is how transports hold writes back until the callback that made
+        them has returned. Sources that run Python code without going through
+        the loop (such as Gtk signal handlers) are covered by a `call_soon()`,
+        which finds nothing left to do in the common case. `callback` must not
+        raise.
+        """
+        if not self._after_dispatch:
+            self.call_soon(self._run_after_dispatch)
+        self._after_dispatch.append(callback)
+
+    def _run_after_dispatch(self):
+        callbacks = self._after_dispatch
+        self._after_dispatch = []
+        for callback in callbacks:
+            callback()
+
+    def run_in_executor(self, executor, func, *args):
+        if executor is None:
+            executor = self._default_executor
+            # Support for `shutdown_default_executor()` was added in Python 3.9
+            if sys.version_info[:2] >= (3, 9):
+                self._check_default_executor()
+            if executor is None:
+                self._check_closed()
+                executor = ThreadPool(thread_name_prefix="gbulb")
+                self._default_executor = executor
+        if not isinstance(executor, ThreadPool):
+            return super().run_in_executor(executor, func, *args)
+
+        self._check_closed()
+        if self._debug:
+            self._check_callback(func, "run_in_executor")
+        future = self.create_future()
+        executor._put_job(func, args, self._executor_job_done, future)
+        return future
+
+    def set_default_executor(self, executor):
+        if isinstance(executor, ThreadPool):
+            self._default_executor = executor
+        else:
+            super().set_default_executor(executor)
+
+    def _executor_job_done(self, future, result, exc):
+        # Called from the worker threads of a `ThreadPool`. Results are
+        # delivered in batches by a single callback, which is only scheduled
+        # (and only wakes up the loop) if it is not pending already. The flag
+        # is cleared before the results are taken over, so none can be missed.
+        self._executor_results.append((future, result, exc))
+        if not self._executor_delivery_pending:
+            self._executor_delivery_pending = True
+            self.call_soon_threadsafe(self._deliver_executor_results)
+
+    def _deliver_executor_results(self):
+        self._executor_delivery_pending = False
+        results = self._executor_results
+        while results:
+            future, result, exc = results.popleft()
+            if future.cancelled():
+                continue
+            if exc is None:
+                future.set_result(result)
+            elif isinstance(exc, CancelledError):
+                future.cancel()
+            else:
+                if isinstance(exc, StopIteration):
+                    # Can't be set on an asyncio future
+                    new_exc = RuntimeError("StopIteration raised in executor")
+                    new_exc.__cause__ = exc
+                    exc = new_exc
+                future.set_exception(exc)
+
     def _make_socket_transport(
         self, sock, protocol, waiter=None, *, extra=None, server=None
     ):
         """Create socket transport."""
-        return transports.SocketTransport(self, sock, protocol, waiter, extra, server)
+        return self._socket_transport_class(self, sock, protocol, waiter, extra, server)
 
     def _make_ssl_transport(
         self,
@@ -352,7 +861,7 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
             server_hostname,
             **extra_protocol_kwargs,
         )
-        transports.SocketTransport(
+        self._socket_transport_class(
             self, rawsock, ssl_protocol, extra=extra, server=server
         )
         return ssl_protocol._app_transport
@@ -434,6 +943,40 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
         """Process selector events."""
         pass  # This is already done in `.select()`
 
+    async def create_server(
+        self,
+        protocol_factory,
+        host=None,
+        port=None,
+        *,
+        max_connections=None,
+        start_serving=True,
+        **kwargs,
+    ):
+        """Create a TCP server, like `asyncio.loop.create_server()`.
+
+        If `max_connections` is given, the server stops accepting new
+        connections once that many are open, and resumes once some of them
+        have been closed. Until then, new connections wait in the listening
+        socket's backlog.
+        """
+        self._check_max_connections(max_connections)
+        server = await super().create_server(
+            protocol_factory, host, port, start_serving=False, **kwargs
+        )
+        return await self._start_server(server, max_connections, start_serving)
+
+    def _check_max_connections(self, max_connections):
+        if max_connections is not None and max_connections < 1:
+            raise ValueError("max_connections must be at least 1 or None")
+
+    async def _start_server(self, server, max_connections, start_serving):
+        if max_connections is not None:
+            self._max_connections[server] = max_connections
+        if start_serving:
+            await server.start_serving()
+        return server
+
     def _start_serving(
         self,
         protocol_factory,
@@ -445,32 +988,84 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
         ssl_shutdown_timeout=getattr(constants, "SSL_SHUTDOWN_TIMEOUT", 60.0),
     ):
         self._transports[sock.fileno()] = server
+        max_connections = (
+            self._max_connections.get(server) if server is not None else None
+        )
+        self._accept_args[sock.fileno()] = (
+            protocol_factory,
+            sock,
+            sslcontext,
+            server,
+            backlog,
+            max_connections,
+            ssl_handshake_timeout,
+            ssl_shutdown_timeout,
+            contextvars.copy_context(),
+        )
+        self._start_accepting(sock)
+
+    def _start_accepting(self, sock):
+        # Rather than waiting for a new `sock_accept()` future (and task) for
+        # every connection, connections are accepted from a single watch that
+        # stays attached until the server stops serving
+        fd = sock.fileno()
+        if fd not in self._accept_handles:
+            self._accept_handles[fd] = self._read_watch(
+                sock, self._accept_connections, *self._accept_args[fd]
+            )
+
+    def _stop_accepting(self, sock):
+        handle = self._accept_handles.pop(sock.fileno(), None)
+        if handle is not None:
+            handle.cancel()
+
+    def _accept_connections(
+        self,
+        protocol_factory,
+        sock,
+        sslcontext,
+        server,
+        backlog,
+        max_connections,
+        ssl_handshake_timeout,
+        ssl_shutdown_timeout,
+        context,
+    ):
+        # Accept up to `backlog` pending connections each time the socket
+        # becomes readable, like asyncio's own event loop
+        for _ in range(backlog):
+            if (
+                max_connections is not None
+                and _server_connections(server) >= max_connections
+            ):
+                # Leave any further connections in the listening socket's
+                # backlog until some of the current ones are closed
+                self._stop_accepting(sock)
+                return
 
-        def server_loop(f=None):
             try:
-                if f is not None:
-                    (conn, addr) = f.result()
-                    protocol = protocol_factory()
-                    if sslcontext is not None:
-                        self._make_ssl_transport(
-                            conn,
-                            protocol,
-                            sslcontext,
-                            server_side=True,
-                            extra={"peername": addr},
-                            server=server,
-                            ssl_handshake_timeout=ssl_handshake_timeout,
-                            ssl_shutdown_timeout=ssl_shutdown_timeout,
-                        )
-                    else:
-                        self._make_socket_transport(
-                            conn, protocol, extra={"peername": addr}, server=server
-                        )
-                if self.is_closed():
-                    return
-                f = self.sock_accept(sock)
+                (conn, addr) = sock.accept()
+                conn.setblocking(False)
+            except (BlockingIOError, InterruptedError, ConnectionAbortedError):
+                # No more pending connections, or the client went away
+                return
             except OSError as exc:
-                if sock.fileno() != -1:
+                if exc.errno in _ACCEPT_RESOURCE_ERRNOS:
+                    # Out of file descriptors or memory: leave the pending
+                    # connections in the backlog for a while, like asyncio's
+                    # own event loop, rather than spinning on the socket
+                    self.call_exception_handler(
+                        {
+                            "message": "socket.accept() out of system resource",
+                            "exception": exc,
+                            "socket": sock,
+                        }
+                    )
+                    self._stop_accepting(sock)
+                    self.call_later(
+                        constants.ACCEPT_RETRY_DELAY, self._resume_accepting, sock
+                    )
+                elif sock.fileno() != -1:
                     self.call_exception_handler(
                         {
                             "message": "Accept failed on a socket",
@@ -478,20 +1073,87 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
                             "socket": sock,
                         }
                     )
-                    sock.close()
-            except CancelledError:
-                sock.close()
+                    self._stop_serving(sock)
+                return
+
+            # Like the task asyncio's own event loop creates for every
+            # connection, each connection gets a copy of the context the
+            # server was started in
+            context.copy().run(
+                self._accept_connection,
+                conn,
+                addr,
+                protocol_factory,
+                sock,
+                sslcontext,
+                server,
+                ssl_handshake_timeout,
+                ssl_shutdown_timeout,
+            )
+
+    def _accept_connection(
+        self,
+        conn,
+        addr,
+        protocol_factory,
+        sock,
+        sslcontext,
+        server,
+        ssl_handshake_timeout,
+        ssl_shutdown_timeout,
+    ):
+        try:
+            protocol = protocol_factory()
+            if sslcontext is not None:
+                self._make_ssl_transport(
+                    conn,
+                    protocol,
+                    sslcontext,
+                    server_side=True,
+                    extra={"peername": addr},
+                    server=server,
+                    ssl_handshake_timeout=ssl_handshake_timeout,
+                    ssl_shutdown_timeout=ssl_shutdown_timeout,
+                )
             else:
-                self._accept_futures[sock.fileno()] = f
-                f.add_done_callback(server_loop)
+                self._make_socket_transport(
+                    conn, protocol, extra={"peername": addr}, server=server
+                )
+        except Exception as exc:
+            conn.close()
+            self.call_exception_handler(
+                {
+                    "message": "Error on transport creation for incoming connection",
+                    "exception": exc,
+                    "socket": sock,
+                }
+            )
 
-        self.call_soon(server_loop)
+    def _resume_accepting(self, sock):
+        # Unless the server has stopped serving in the meantime
+        if sock.fileno() in self._accept_args:
+            self._start_accepting(sock)
 
     def _stop_serving(self, sock):
-        if sock.fileno() in self._accept_futures:
-            self._accept_futures[sock.fileno()].cancel()
+        self._stop_accepting(sock)
+        self._accept_args.pop(sock.fileno(), None)
         sock.close()
 
+    def _server_detached(self, server):
+        """Resume accepting connections for a server that has reached its
+        maximum number of connections, once one of them has been closed."""
+        if server not in self._max_connections:
+            return
+
+        for fd, args in list(self._accept_args.items()):
+            sock, max_connections = args[1], args[5]
+            if (
+                args[3] is server
+                and fd not in self._accept_handles
+                and _server_connections(server) < max_connections
+            ):
+                self._start_accepting(sock)
+
     def _check_not_coroutine(self, callback, name):
         """Check whether the given callback is a coroutine or not."""
         from asyncio import coroutines
@@ -603,10 +1265,53 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
         # handle's cancellation machinery
         future = asyncio.Future(loop=self)
         future.handle = GLibHandle(
-            loop=self, source=source, repeat=True, callback=handle_ready, args=args
+            loop=self,
+            source=source,
+            repeat=True,
+            callback=handle_ready,
+            args=args,
+            context=_NO_CONTEXT,
         )
         return future
 
+    def _read_watch(self, fileobj, callback, *args, context=_NO_CONTEXT):
+        """Call `callback` whenever the given file object becomes readable.
+
+        Unlike the futures returned by the `sock_*` methods, the returned
+        handle keeps watching the file object until it is cancelled, so
+        transports can use a single watch for their whole lifetime. Callbacks
+        that run user code have to pass the `context` to run it in.
+        """
+        channel = self._channel_from_socket(fileobj)
+        source = GLib.io_create_watch(
+            channel, GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR | GLib.IO_NVAL
+        )
+        return GLibHandle(
+            loop=self,
+            source=source,
+            repeat=True,
+            callback=callback,
+            args=args,
+            context=context,
+        )
+
+    def _write_watch(self, fileobj, callback, *args, context=_NO_CONTEXT):
+        """Call `callback` whenever the given file object becomes writable.
+
+        Like `_read_watch()`, the returned handle keeps watching the file
+        object until it is cancelled.
+        """
+        channel = self._channel_from_socket(fileobj)
+        source = GLib.io_create_watch(channel, GLib.IO_OUT | GLib.IO_ERR | GLib.IO_NVAL)
+        return GLibHandle(
+            loop=self,
+            source=source,
+            repeat=True,
+            callback=callback,
+            args=args,
+            context=context,
+        )
+
     def _socket_handle_errors(self, sock):
         """Raise exceptions for error states (SOL_ERROR) on the given socket
         object."""
@@ -701,6 +1406,80 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
 
         return self._channel_write(channel, buf, write_func)
 
+    async def _sock_sendfile_native(self, sock, file, offset, count):
+        if not hasattr(os, "sendfile"):
+            raise exceptions.SendfileNotAvailableError("os.sendfile() is not available")
+        try:
+            fileno = file.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            raise exceptions.SendfileNotAvailableError("not a regular file")
+        try:
+            fsize = os.fstat(fileno).st_size
+        except OSError:
+            raise exceptions.SendfileNotAvailableError("not a regular file")
+        blocksize = count if count else fsize
+        if not blocksize:
+            return 0  # Empty file
+
+        # Send the file from a single watch, with a `sendfile()` call every
+        # time the socket becomes writable, rather than going through
+        # `add_writer()` (and creating a new watch) after every chunk
+        fd = sock.fileno()
+        future = self.create_future()
+        total_sent = 0
+
+        def sock_sendfile_ready():
+            nonlocal offset, total_sent
+            if future.done():
+                return
+            size = count - total_sent if count else blocksize
+            if size <= 0:
+                future.set_result(total_sent)
+                return
+
+            try:
+                sent = os.sendfile(fd, fileno, offset, size)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as exc:
+                if total_sent == 0:
+                    # Most likely not a regular file, which can still be sent
+                    # by the fallback implementation
+                    exc = exceptions.SendfileNotAvailableError(
+                        "os.sendfile call failed"
+                    )
+                future.set_exception(exc)
+                return
+
+            if sent == 0:
+                future.set_result(total_sent)  # End-of-file
+            else:
+                offset += sent
+                total_sent += sent
+
+        handle = self._write_watch(sock, sock_sendfile_ready)
+        try:
+            return await future
+        finally:
+            handle.cancel()
+            if total_sent > 0:
+                # Leave the file position after the data that has been sent
+                os.lseek(fileno, offset, os.SEEK_SET)
+
+    async def _sendfile_native(self, transp, file, offset, count):
+        resume_reading = transp.is_reading()
+        if resume_reading:
+            transp.pause_reading()
+        await transp._make_empty_waiter()
+        try:
+            return await self.sock_sendfile(
+                transp._sock, file, offset, count, fallback=False
+            )
+        finally:
+            transp._reset_empty_waiter()
+            if resume_reading:
+                transp.resume_reading()
+
     #####################################
     # Low-level GLib.Channel operations #
     #####################################
@@ -713,7 +1492,11 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
         source = GLib.io_create_watch(channel, GLib.IO_IN | GLib.IO_HUP)
 
         def channel_readable(read_func, channel, nbytes):
-            return (True, read_func(channel, nbytes))
+            try:
+                return (True, read_func(channel, nbytes))
+            except (BlockingIOError, InterruptedError):
+                # Spurious wake-up, keep waiting
+                return (False, None)
 
         return self._delayed(source, channel_readable, read_func, channel, nbytes)
 
@@ -722,100 +1505,82 @@ class GLibBaseEventLoop(_BaseEventLoop, GLibBaseEventLoopPlatformExt):
             # note: channel.write doesn't raise BlockingIOError, instead it
             # returns 0
             # gi.overrides.GLib.write has an isinstance(buf, bytes) check, so
-            # we can't give it a bytearray or a memoryview.
+            # we can't give it a bytearray or a memoryview. Limit how much is
+            # copied for every attempt, as it may only be partially written.
             def write_func(channel, buf):
-                return channel.write(bytes(buf))
+                return channel.write(bytes(buf[:_CHANNEL_WRITE_SIZE]))
 
-        buflen = len(buf)
+        view = memoryview(buf).cast("B")
+        buflen = len(view)
 
         # Fast-path: If there is enough room in the OS buffer all data can be written synchronously
         try:
-            nbytes = write_func(channel, buf)
+            nbytes = write_func(channel, view)
         except BlockingIOError:
             nbytes = 0
         else:
-            if nbytes >= len(buf):
+            if nbytes >= buflen:
                 # All data was written synchronously in one go
                 result = asyncio.Future(loop=self)
                 result.set_result(nbytes)
                 return result
 
-        # Chop off the initially transmitted data and store result
-        # as a bytearray for easier future modification
-        buf = bytearray(buf[nbytes:])
-
-        # Send the remaining data asynchronously as the socket becomes writable
+        # Send the remaining data asynchronously as the socket becomes
+        # writable. Only the position of the remaining data is tracked, so
+        # that it never needs to be moved around, no matter how many partial
+        # writes it takes. The caller may reuse a mutable buffer as soon as
+        # this returns though, so the rest of it is copied once.
         source = GLib.io_create_watch(channel, GLib.IO_OUT)
+        pos = nbytes
+        if not view.readonly:
+            view = memoryview(view[nbytes:].tobytes())
+            pos = 0
 
-        def channel_writable(buflen, write_func, channel, buf):
-            nbytes = write_func(channel, buf)
-            if nbytes >= len(buf):
-                return (True, buflen)
-            else:
-                del buf[0:nbytes]
-                return (False, buflen)
-
-        return self._delayed(source, channel_writable, buflen, write_func, channel, buf)
-
-    def add_reader(self, fileobj, callback, *args):
-        fd = self._fileobj_to_fd(fileobj)
-        self._ensure_fd_no_transport(fd)
-
-        self.remove_reader(fd)
-        channel = self._channel_from_socket(fd)
-        source = GLib.io_create_watch(
-            channel, GLib.IO_IN | GLib.IO_HUP | GLib.IO_ERR | GLib.IO_NVAL
-        )
-
-        assert fd not in self._readers
-        self._readers[fd] = GLibHandle(
-            loop=self, source=source, repeat=True, callback=callback, args=args
-        )
-
-    def remove_reader(self, fileobj):
-        fd = self._fileobj_to_fd(fileobj)
-        self._ensure_fd_no_transport(fd)
-
-        try:
-            self._readers.pop(fd).cancel()
-            return True
-        except KeyError:
-            return False
-
-    def add_writer(self, fileobj, callback, *args):
-        fd = self._fileobj_to_fd(fileobj)
-        self._ensure_fd_no_transport(fd)
-
-        self.remove_writer(fd)
-        channel = self._channel_from_socket(fd)
-        source = GLib.io_create_watch(channel, GLib.IO_OUT | GLib.IO_ERR | GLib.IO_NVAL)
-
-        assert fd not in self._writers
-        self._writers[fd] = GLibHandle(
-            loop=self, source=source, repeat=True, callback=callback, args=args
+        def channel_writable(buflen, write_func, channel, view):
+            nonlocal pos
+            try:
+                pos += write_func(channel, view[pos:])
+            except (BlockingIOError, InterruptedError):
+                # Spurious wake-up, keep waiting
+                pass
+            return (pos >= len(view), buflen)
+
+        return self._delayed(
+            source, channel_writable, buflen, write_func, channel, view
         )
 
-    def remove_writer(self, fileobj):
-        fd = self._fileobj_to_fd(fileobj)
-        self._ensure_fd_no_transport(fd)
-
-        try:
-            self._writers.pop(fd).cancel()
-            return True
-        except KeyError:
-            return False
-
 
 class GLibEventLoop(GLibBaseEventLoop):
-    def __init__(self, *, context=None, application=None):
+    def __init__(self, *, context=None, application=None, transport_engine="readiness"):
         self._application = application
         self._running = False
         self._argv = None
 
-        super().__init__(context)
+        super().__init__(context, transport_engine)
         if application is None:
             self._mainloop = GLib.MainLoop(self._context)
 
+        # All `call_soon` callbacks are queued in `self._ready` and all
+        # `call_later`/`call_at` timers are kept in the `self._scheduled`
+        # heap (the same structures asyncio's own event loop uses). A single
+        # source, armed for either "now" or the earliest deadline, runs them
+        # all, along with the callbacks queued by `call_soon_threadsafe()`.
+        # It must be allowed to recurse so that callbacks keep running from
+        # nested main loops (such as `Gtk.main()`).
+        self._callback_source = _CallbackSource(self._run_callbacks)
+        self._callback_source.set_priority(GLib.PRIORITY_DEFAULT)
+        self._callback_source.set_can_recurse(True)
+        self._callback_source.attach(self._context)
+        self._callback_source_ready_time = -1
+
+        # `time()` and the ready times of sources are based on GLib's
+        # monotonic clock, which has a microsecond resolution
+        self._clock_resolution = 1e-6
+
+    def close(self):
+        super().close()
+        self._callback_source.destroy()
+
     def is_running(self):
         return self._running
 
@@ -830,10 +1595,18 @@ class GLibEventLoop(GLibBaseEventLoop):
                 "Cannot run the event loop while another loop is running"
             )
 
+        # While it runs, the loop's context is made the thread-default
+        # context, so that GIO operations started from its callbacks are
+        # completed through it as well (rather than through the global
+        # default context, which is iterated by the main thread, if at all)
+        push_context = not recursive and self._context != GLib.main_context_default()
+
         if not recursive:
             self._running = True
             if hasattr(events, "_set_running_loop"):
                 events._set_running_loop(self)
+        if push_context:
+            self._context.push_thread_default()
 
         try:
             if self._application is not None:
@@ -841,6 +1614,8 @@ class GLibEventLoop(GLibBaseEventLoop):
             else:
                 self._mainloop.run()
         finally:
+            if push_context:
+                self._context.pop_thread_default()
             if not recursive:
                 self._running = False
                 if hasattr(events, "_set_running_loop"):
@@ -888,40 +1663,131 @@ class GLibEventLoop(GLibBaseEventLoop):
         finally:
             self.stop()
 
-    # Methods scheduling callbacks.  All these return Handles.
-    def call_soon(self, callback, *args, context=None):
-        self._check_not_coroutine(callback, "call_soon")
-        source = GLib.Idle()
+    def _arm_callback_source(self, ready_time):
+        if ready_time != self._callback_source_ready_time:
+            self._callback_source_ready_time = ready_time
+            self._callback_source.set_ready_time(ready_time)
 
-        source.set_priority(GLib.PRIORITY_DEFAULT)
+    def _run_callbacks(self):
+        """Run all timers that are due and the callbacks that were queued
+        (from any thread) when the dispatch started.
 
-        return GLibHandle(
-            loop=self,
-            source=source,
-            repeat=False,
-            callback=callback,
-            args=args,
-            context=context,
-        )
+        Callbacks scheduled while the queue is being processed are left for
+        the next dispatch, so that other sources get a chance to run in
+        between.
+        """
+        ready = self._ready
+        scheduled = self._scheduled
+
+        # Purge cancelled timers: in bulk if there are many of them,
+        # otherwise only the ones that are blocking the top of the heap
+        sched_count = len(scheduled)
+        if (
+            sched_count > _MIN_SCHEDULED_TIMER_HANDLES
+            and self._timer_cancelled_count / sched_count
+            > _MIN_CANCELLED_TIMER_HANDLES_FRACTION
+        ):
+            new_scheduled = []
+            for handle in scheduled:
+                if handle._cancelled:
+                    handle._scheduled = False
+                else:
+                    new_scheduled.append(handle)
 
-    call_soon_threadsafe = call_soon
+            heapq.heapify(new_scheduled)
+            self._scheduled = scheduled = new_scheduled
+            self._timer_cancelled_count = 0
+        else:
+            while scheduled and scheduled[0]._cancelled:
+                self._timer_cancelled_count -= 1
+                handle = heapq.heappop(scheduled)
+                handle._scheduled = False
+
+        # Queue all timers that are due behind the callbacks already queued
+        end_time = self.time() + self._clock_resolution
+        while scheduled and scheduled[0]._when < end_time:
+            handle = heapq.heappop(scheduled)
+            handle._scheduled = False
+            ready.append(handle)
+
+        # Take over the callbacks queued by other threads in one go
+        pending = self._callback_source.pending
+        while pending:
+            ready.append(pending.popleft())
+
+        ntodo = len(ready)
+        try:
+            # A nested main loop may have drained the queue from under us
+            while ntodo and ready:
+                ntodo -= 1
+                handle = ready.popleft()
+                if not handle._cancelled:
+                    handle._run()
+        finally:
+            if self._after_dispatch:
+                self._run_after_dispatch()
+            if ready:
+                self._arm_callback_source(0)
+            else:
+                self._arm_callback_source(self._timer_ready_time())
+                # Re-check after re-arming, in case another thread queued a
+                # callback in the meantime
+                if ready:
+                    self._callback_source_ready_time = 0
+                    self._callback_source.set_ready_time(0)
+
+    def _timer_ready_time(self):
+        """Return the GLib ready time of the earliest timer, or -1."""
+        if self._scheduled:
+            return _ready_time(self._scheduled[0]._when)
+        return -1
+
+    # Methods scheduling callbacks.  All these return Handles.
+    def call_soon(self, callback, *args, context=None):
+        self._check_not_coroutine(callback, "call_soon")
+        handle = events.Handle(callback, args, self, context)
+
+        idle = not self._ready
+        self._ready.append(handle)
+        if idle:
+            self._callback_source_ready_time = 0
+            self._callback_source.set_ready_time(0)
+        return handle
+
+    def call_soon_threadsafe(self, callback, *args, context=None):
+        self._check_not_coroutine(callback, "call_soon_threadsafe")
+        handle = events.Handle(callback, args, self, context)
+
+        # Appending to a deque is atomic, so this does not need any lock, and
+        # the context is woken up at most once until the next iteration
+        source = self._callback_source
+        source.pending.append(handle)
+        if not source.wakeup_pending:
+            source.wakeup_pending = True
+            self._context.wakeup()
+        return handle
 
     def call_later(self, delay, callback, *args, context=None):
         self._check_not_coroutine(callback, "call_later")
 
-        return GLibHandle(
-            loop=self,
-            source=GLib.Timeout(delay * 1000) if delay > 0 else GLib.Idle(),
-            repeat=False,
-            callback=callback,
-            args=args,
-            context=context,
-        )
+        return self._call_at(self.time() + delay, callback, args, context)
 
     def call_at(self, when, callback, *args, context=None):
         self._check_not_coroutine(callback, "call_at")
 
-        return self.call_later(when - self.time(), callback, *args, context=context)
+        return self._call_at(when, callback, args, context)
+
+    def _call_at(self, when, callback, args, context):
+        handle = events.TimerHandle(when, callback, args, self, context)
+        heapq.heappush(self._scheduled, handle)
+        handle._scheduled = True
+
+        # Cancelling a timer only marks it as such (see `_run_callbacks`), so
+        # the source only has to be touched if this is the new earliest
+        # deadline and there is no more urgent work pending already.
+        if self._scheduled[0] is handle and self._callback_source_ready_time != 0:
+            self._arm_callback_source(self._timer_ready_time())
+        return handle
 
     def time(self):
         return GLib.get_monotonic_time() / 1000000
@@ -964,12 +1830,16 @@ class GLibEventLoopPolicy(events.AbstractEventLoopPolicy):
     In this policy, each thread has its own event loop.  However, we
     only automatically create an event loop by default for the main
     thread; other threads by default have no event loop.
+
+    The loop of the main thread uses GLib's global default context. Loops
+    created for other threads use the thread-default context of the thread
+    (see `g_main_context_push_thread_default()`) if it has one, and a new
+    context otherwise, which they push as the thread-default context while
+    they are running.
     """
 
     EventLoopCls = GLibEventLoop
 
-    # TODO add a parameter to synchronise with GLib's thread default contexts
-    # (i.e., g_main_context_push_thread_default())
     def __init__(self, application=None):
         self._default_loop = None
         self._application = application
@@ -1009,7 +1879,10 @@ class GLibEventLoopPolicy(events.AbstractEventLoopPolicy):
         ):
             loop = self.get_default_loop()
         else:
-            loop = self.EventLoopCls()
+            # Loops on other threads use the thread-default context if there
+            # is one, and otherwise a new context that they make the
+            # thread-default context whenever they run
+            loop = self.EventLoopCls(context=GLib.MainContext.get_thread_default())
         loop._policy = self
 
         return loop
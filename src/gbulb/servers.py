@@ -0,0 +1,573 @@
+import asyncio
+import functools
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import traceback
+import warnings
+
+from gi.repository import GLib
+
+from .glib_events import GLibChildWatcher, GLibEventLoop, _server_connections
+
+__all__ = ["MultiLoopServer", "PreforkServer"]
+
+
+class _WorkerEventLoop(GLibEventLoop):
+    """Event loop of a `MultiLoopServer` worker, which keeps count of the
+    connections that it accepts and closes in the shared `stats` array."""
+
+    def __init__(self, stats, index):
+        super().__init__()
+        self._stats = stats
+        self._index = index
+        self._connections_closed = None
+
+    def _server_detached(self, server):
+        super()._server_detached(server)
+        self._stats[self._index * 2 + 1] += 1
+        if (
+            self._connections_closed is not None
+            and not self._connections_closed.done()
+            and not _server_connections(server)
+        ):
+            self._connections_closed.set_result(None)
+
+    async def _serve_until_stopped(self, server, conn):
+        stopped = self.create_future()
+
+        def stop_requested():
+            self.remove_reader(conn)
+            try:
+                timeout = conn.recv()
+            except EOFError:
+                # The parent has gone away, let the open connections finish
+                timeout = None
+            stopped.set_result(timeout)
+
+        self.add_reader(conn, stop_requested)
+        timeout = await stopped
+
+        # Stop accepting connections, and give the open ones some time to
+        # finish before aborting them
+        server.close()
+        if _server_connections(server):
+            self._connections_closed = self.create_future()
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(self._connections_closed), timeout
+                )
+            except asyncio.TimeoutError:
+                for transport in list(self._transports.values()):
+                    if getattr(transport, "_server", None) is server:
+                        transport.abort()
+                await self._connections_closed
+        await server.wait_closed()
+
+
+def _run_worker(index, stats, conn, protocol_factory, kwargs):
+    loop = _WorkerEventLoop(stats, index)
+
+    def counting_protocol_factory():
+        stats[index * 2] += 1
+        return protocol_factory()
+
+    try:
+        try:
+            server = loop.run_until_complete(
+                loop.create_server(counting_protocol_factory, **kwargs)
+            )
+        except Exception as exc:
+            conn.send(("error", exc))
+            return
+
+        conn.send(("ready", server.sockets[0].getsockname()))
+        loop.run_until_complete(loop._serve_until_stopped(server, conn))
+    finally:
+        loop.close()
+        conn.close()
+
+
+def _stats_summary(stats, workers):
+    """Sum up `stats`, which holds one or more (accepted, closed) pairs of
+    counters for each of the `workers` workers, in order."""
+    stats = list(stats or ())
+    size = len(stats) // workers if stats else 2
+    workers = [
+        {
+            "accepted": sum(stats[i : i + size : 2]),
+            "active": sum(stats[i : i + size : 2]) - sum(stats[i + 1 : i + size : 2]),
+        }
+        for i in range(0, len(stats), size)
+    ]
+    return {
+        "accepted": sum(worker["accepted"] for worker in workers),
+        "active": sum(worker["active"] for worker in workers),
+        "workers": workers,
+    }
+
+
+class MultiLoopServer:
+    """Serve the same address from several event loops.
+
+    Each worker runs its own `GLibEventLoop`, in a thread or in a process of
+    its own, with its own listening socket bound with `SO_REUSEPORT`, so
+    that the kernel spreads the incoming connections between them. Threads
+    share the GIL, so only processes make use of several cores for Python
+    code. Processes are started with `mp_context` (by default, the "spawn"
+    method, as forking a process that uses GLib is not safe), so
+    `protocol_factory` and the other arguments have to be picklable.
+
+    The remaining keyword arguments are passed on to `create_server()`. If
+    `port` is 0, the port picked for the first worker is used by all of them.
+    """
+
+    def __init__(
+        self,
+        protocol_factory,
+        host=None,
+        port=None,
+        *,
+        workers=None,
+        processes=False,
+        mp_context=None,
+        **kwargs,
+    ):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+
+        self._protocol_factory = protocol_factory
+        self._host = host
+        self._port = port
+        self._kwargs = kwargs
+        self._worker_count = workers
+        self._processes = processes
+        self._mp_context = mp_context
+        self._workers = []
+        self._conns = []
+        self._stats = None
+        self.address = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        """Start the workers, and wait until all of them are listening.
+
+        Raises the exception of the first worker that fails to start (after
+        stopping the others).
+        """
+        if self._workers:
+            raise RuntimeError("server is already started")
+
+        if self._processes:
+            if self._mp_context is None:
+                self._mp_context = multiprocessing.get_context("spawn")
+            self._stats = self._mp_context.Array(
+                "q", self._worker_count * 2, lock=False
+            )
+        else:
+            self._stats = [0] * (self._worker_count * 2)
+
+        try:
+            # The first worker picks the port if needed, and the others
+            # then start all at once
+            self.address = self._wait_ready(self._start_worker(0, self._port))
+            port = self.address[1]
+            indexes = [
+                self._start_worker(i, port) for i in range(1, self._worker_count)
+            ]
+            for index in indexes:
+                self._wait_ready(index)
+        except BaseException:
+            self.stop(timeout=0)
+            raise
+
+    def stop(self, timeout=None):
+        """Stop all the workers.
+
+        The workers stop accepting connections right away, and wait for the
+        open connections to be closed, for at most `timeout` seconds (or as
+        long as it takes if it is None) before aborting them.
+        """
+        for conn in self._conns:
+            try:
+                conn.send(timeout)
+            except OSError:
+                pass  # The worker has stopped already
+        for worker in self._workers:
+            worker.join()
+        for conn in self._conns:
+            conn.close()
+        self._workers = []
+        self._conns = []
+
+    def stats(self):
+        """Return the number of connections accepted by all the workers so
+        far, and the number of them that are open, in total and for each
+        worker."""
+        return _stats_summary(self._stats, self._worker_count)
+
+    def _start_worker(self, index, port):
+        if self._processes:
+            conn, worker_conn = self._mp_context.Pipe()
+            worker = self._mp_context.Process(
+                target=_run_worker,
+                args=(
+                    index,
+                    self._stats,
+                    worker_conn,
+                    self._protocol_factory,
+                    dict(self._kwargs, host=self._host, port=port, reuse_port=True),
+                ),
+                name=f"MultiLoopServer-{index}",
+                daemon=True,
+            )
+        else:
+            conn, worker_conn = multiprocessing.Pipe()
+            worker = threading.Thread(
+                target=_run_worker,
+                args=(
+                    index,
+                    self._stats,
+                    worker_conn,
+                    self._protocol_factory,
+                    dict(self._kwargs, host=self._host, port=port, reuse_port=True),
+                ),
+                name=f"MultiLoopServer-{index}",
+                daemon=True,
+            )
+        worker.start()
+        if self._processes:
+            # So that reading from `conn` fails if the process dies
+            worker_conn.close()
+        self._workers.append(worker)
+        self._conns.append(conn)
+        return index
+
+    def _wait_ready(self, index):
+        try:
+            status, value = self._conns[index].recv()
+        except EOFError:
+            raise RuntimeError(f"worker {index} exited during startup") from None
+        if status == "error":
+            raise value
+        return value
+
+
+class PreforkServer:
+    """Serve a listening socket from forked worker processes.
+
+    The parent binds the listening socket (or takes `sock`) and forks
+    `workers` child processes, which inherit it and serve it from a
+    `GLibEventLoop` of their own. The parent supervises them from its running
+    loop: a worker that exits unexpectedly is started again after
+    `restart_delay` seconds, SIGTERM stops the server gracefully, giving the
+    open connections `shutdown_timeout` seconds to finish, and `restart()`
+    replaces the workers one at a time.
+
+    Child processes are watched with a `GLibChildWatcher`, which attaches to
+    GLib's global default context, so the parent's loop has to run on it (as
+    the loop of the main thread does). The remaining keyword arguments are
+    passed on to `create_server()` in the workers. Not available on Windows.
+    """
+
+    def __init__(
+        self,
+        protocol_factory,
+        host=None,
+        port=None,
+        *,
+        sock=None,
+        workers=None,
+        backlog=100,
+        restart_delay=1.0,
+        shutdown_timeout=None,
+        **kwargs,
+    ):
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if sock is not None and (host is not None or port is not None):
+            raise ValueError("host/port and sock can not be specified at the same time")
+
+        self._protocol_factory = protocol_factory
+        self._host = host
+        self._port = port
+        self._sock = sock
+        self._backlog = backlog
+        self._kwargs = kwargs
+        self._worker_count = workers
+        self._restart_delay = restart_delay
+        self._shutdown_timeout = shutdown_timeout
+        self._loop = None
+        self._watcher = None
+        self._stats = None
+        self._stopping = False
+        self._stopped = None
+        # The pid of the current worker of each index, and its slot in
+        # `_stats`: each index has two slots, so that a worker and its
+        # replacement never update the same counters
+        self._workers = [None] * workers
+        self._slots = [index * 2 for index in range(workers)]
+        self._replacing = set()
+        # The control pipe and the exit future of every worker that is alive
+        self._conns = {}
+        self._exits = {}
+        self._restart_handles = {}
+        self._tasks = set()
+        self.address = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    async def start(self):
+        """Bind the listening socket, fork the workers, and wait until all
+        of them are serving it.
+
+        Raises the exception of the first worker that fails to start (after
+        stopping the others).
+        """
+        if self._loop is not None:
+            raise RuntimeError("server is already started")
+
+        loop = asyncio.get_running_loop()
+        if getattr(loop, "_context", None) != GLib.main_context_default():
+            raise RuntimeError(
+                "PreforkServer needs a loop running on GLib's default context"
+            )
+
+        if self._sock is None:
+            host = self._host or ""
+            family = socket.AF_INET6 if ":" in host else socket.AF_INET
+            self._sock = socket.create_server(
+                (host, self._port or 0), family=family, backlog=self._backlog
+            )
+        self.address = self._sock.getsockname()
+
+        self._loop = loop
+        self._stopped = loop.create_future()
+        self._watcher = GLibChildWatcher()
+        self._stats = multiprocessing.Array("q", self._worker_count * 4, lock=False)
+
+        try:
+            for index in range(self._worker_count):
+                await self._start_worker(index)
+        except BaseException:
+            await self.stop(timeout=0)
+            raise
+        loop.add_signal_handler(signal.SIGTERM, self._terminate)
+
+    async def restart(self, timeout=None):
+        """Replace the workers one at a time.
+
+        Each worker is only stopped once its replacement is serving the
+        socket, and it then stops like in `stop()`, so that no connection is
+        refused while the server restarts.
+        """
+        if self._loop is None or self._stopping:
+            raise RuntimeError("server is not running")
+
+        for index in range(self._worker_count):
+            self._replacing.add(index)
+            try:
+                pid = self._workers[index]
+                await self._start_worker(index)
+            finally:
+                self._replacing.discard(index)
+            if pid is not None:
+                await self._stop_worker(pid, timeout)
+
+    async def stop(self, timeout=None):
+        """Stop all the workers, and close the listening socket.
+
+        The workers stop accepting connections right away, and wait for the
+        open connections to be closed, for at most `timeout` seconds (or as
+        long as it takes if it is None) before aborting them.
+        """
+        if self._loop is None:
+            return
+        if self._stopping:
+            await asyncio.shield(self._stopped)
+            return
+
+        self._stopping = True
+        self._loop.remove_signal_handler(signal.SIGTERM)
+        for handle in self._restart_handles.values():
+            handle.cancel()
+        self._restart_handles = {}
+
+        await asyncio.gather(
+            *[self._stop_worker(pid, timeout) for pid in list(self._exits)]
+        )
+        self._watcher.close()
+        self._sock.close()
+        self._stopped.set_result(None)
+
+    async def serve_forever(self):
+        """Start the server if needed, and wait until it is stopped, by
+        `stop()` or SIGTERM.
+
+        The server is stopped if this is cancelled.
+        """
+        if self._loop is None:
+            await self.start()
+        try:
+            await asyncio.shield(self._stopped)
+        except asyncio.CancelledError:
+            await self.stop(self._shutdown_timeout)
+            raise
+
+    def stats(self):
+        """Return the number of connections accepted by all the workers so
+        far, and the number of them that are open, in total and for each
+        worker."""
+        return _stats_summary(self._stats, self._worker_count)
+
+    async def _start_worker(self, index):
+        slot = self._slots[index] ^ 1
+        conn, worker_conn = multiprocessing.Pipe()
+
+        with warnings.catch_warnings():
+            # Python warns about forking a process with several threads; the
+            # child doesn't use any of the parent's threads or GLib sources,
+            # only a loop and a context of its own.
+            warnings.simplefilter("ignore", DeprecationWarning)
+            pid = os.fork()
+
+        if pid == 0:  # pragma: no cover
+            self._run_child(slot, conn, worker_conn)
+
+        worker_conn.close()
+        self._conns[pid] = conn
+        self._exits[pid] = self._loop.create_future()
+        self._watcher.add_child_handler(pid, self._child_exited, index)
+
+        ready = self._loop.create_future()
+
+        def readable():
+            self._loop.remove_reader(conn)
+            try:
+                ready.set_result(conn.recv())
+            except (EOFError, OSError):
+                ready.set_exception(
+                    RuntimeError(f"worker {index} exited during startup")
+                )
+
+        self._loop.add_reader(conn, readable)
+        try:
+            status, value = await ready
+        finally:
+            self._loop.remove_reader(conn)
+        if status == "error":
+            raise value
+
+        self._workers[index] = pid
+        self._slots[index] = slot
+        return pid
+
+    def _run_child(self, slot, conn, worker_conn):  # pragma: no cover
+        status = 1
+        try:
+            # Only keep the control pipe of this worker, so that the others
+            # see the end of their own when the parent exits
+            conn.close()
+            for other in self._conns.values():
+                other.close()
+
+            # GLib's signal handling relies on a thread that doesn't survive
+            # the fork: use the default SIGTERM behaviour, and leave SIGINT
+            # to the parent, which stops the workers through their pipe.
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            asyncio.events._set_running_loop(None)
+
+            _run_worker(
+                slot,
+                self._stats,
+                worker_conn,
+                self._protocol_factory,
+                dict(self._kwargs, sock=self._sock),
+            )
+            status = 0
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            os._exit(status)
+
+    async def _stop_worker(self, pid, timeout):
+        exited = self._exits.get(pid)
+        if exited is None:
+            return
+        try:
+            self._conns[pid].send(timeout)
+        except OSError:
+            pass  # The worker has stopped already
+        await exited
+
+    def _terminate(self):
+        task = self._loop.create_task(self.stop(self._shutdown_timeout))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _child_exited(self, pid, returncode, index):
+        self._loop.call_soon_threadsafe(self._worker_exited, pid, returncode, index)
+
+    def _worker_exited(self, pid, returncode, index):
+        self._conns.pop(pid).close()
+        self._exits.pop(pid).set_result(returncode)
+
+        if self._workers[index] != pid or self._stopping or index in self._replacing:
+            return
+
+        # Whatever connections the worker had open are gone with it
+        slot = self._slots[index]
+        self._stats[slot * 2 + 1] = self._stats[slot * 2]
+        self._workers[index] = None
+
+        self._loop.call_exception_handler(
+            {
+                "message": (
+                    f"PreforkServer worker {index} (pid {pid}) exited with "
+                    f"status {returncode}, restarting it"
+                )
+            }
+        )
+        self._schedule_restart(index)
+
+    def _schedule_restart(self, index):
+        self._restart_handles[index] = self._loop.call_later(
+            self._restart_delay, self._restart_worker, index
+        )
+
+    def _restart_worker(self, index):
+        del self._restart_handles[index]
+        task = self._loop.create_task(self._start_worker(index))
+        self._tasks.add(task)
+        task.add_done_callback(functools.partial(self._worker_restarted, index))
+
+    def _worker_restarted(self, index, task):
+        self._tasks.discard(task)
+        if task.cancelled() or task.exception() is None or self._stopping:
+            return
+
+        self._loop.call_exception_handler(
+            {
+                "message": "PreforkServer failed to restart a worker",
+                "exception": task.exception(),
+            }
+        )
+        self._schedule_restart(index)
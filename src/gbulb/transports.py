@@ -1,10 +1,50 @@
 import asyncio
 import collections
+import contextvars
 import io
+import itertools
+import os
 import socket
 import subprocess
 import sys
-from asyncio import CancelledError, InvalidStateError, base_subprocess, transports
+from asyncio import (
+    CancelledError,
+    InvalidStateError,
+    base_subprocess,
+    constants,
+    transports,
+)
+
+_HAS_READV = hasattr(os, "readv")
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+if _HAS_SENDMSG:
+    try:
+        SC_IOV_MAX = os.sysconf("SC_IOV_MAX")
+    except OSError:
+        # Fall back to sending one buffer at a time
+        _HAS_SENDMSG = False
+
+
+def _readv_fd(fd, view):
+    """Read into the given memoryview from a non-blocking file descriptor.
+
+    Returns the number of bytes read. Like `GLib.IOChannel.read()`, this keeps
+    reading until either the buffer is full or no more data is available,
+    rather than returning after the first read.
+    """
+    nbytes = total = os.readv(fd, [view])
+    while nbytes and total < len(view):
+        try:
+            nbytes = os.readv(fd, [view[total:]])
+        except (BlockingIOError, InterruptedError):
+            break
+        total += nbytes
+    return total
+
+
+def _write_fd(channel, view):
+    """Write the given memoryview to the channel's file descriptor."""
+    return os.write(channel.unix_get_fd(), view)
 
 
 class BaseTransport(transports.BaseTransport):
@@ -88,39 +128,87 @@ class BaseTransport(transports.BaseTransport):
                     self._server._detach()
                 else:
                     self._server._detach(self)
+                self._loop._server_detached(self._server)
                 self._server = None
 
 
 class ReadTransport(BaseTransport, transports.ReadTransport):
+    # Number of bytes requested by the first read
     max_size = io.DEFAULT_BUFFER_SIZE
 
+    # The read size doubles whenever a read fills the buffer, and is halved
+    # after several reads in a row have used only a fraction of it
+    adaptive_read_size = True
+    min_read_size = 1024
+    max_read_size = 256 * 1024
+
     def __init__(self, *args, **kwargs):
         self._paused = False
         self._read_fut = None
         self._read_buffer = None
         self._alloc_read_buffers = False
+        self._read_size = self.max_size
+        self._read_size_fixed = False
+        self._small_reads = 0
 
         BaseTransport.__init__(self, *args, **kwargs)
 
         self._loop.call_soon(self._loop_reading)
 
+    def get_extra_info(self, name, default=None):
+        if name == "read_size":
+            return self._read_size
+        return super().get_extra_info(name, default)
+
+    def set_read_size(self, size=None):
+        """Set the number of bytes requested by every read.
+
+        This turns off the adaptive read size. Pass `None` to go back to the
+        transport's default behaviour.
+        """
+        if size is None:
+            self._read_size = self.max_size
+            self._read_size_fixed = False
+        elif size < 1:
+            raise ValueError("size must be at least 1 or None")
+        else:
+            self._read_size = size
+            self._read_size_fixed = True
+        self._small_reads = 0
+
     def set_protocol(self, protocol):
         self._alloc_read_buffers = isinstance(protocol, asyncio.BufferedProtocol)
         super().set_protocol(protocol)
 
+    def is_reading(self):
+        return not self._paused and not self._closing
+
+    def _adapt_read_size(self, nbytes):
+        if not self.adaptive_read_size or self._read_size_fixed:
+            return
+
+        if nbytes >= self._read_size:
+            self._small_reads = 0
+            self._read_size = min(self._read_size * 2, self.max_read_size)
+        elif nbytes <= self._read_size // 4:
+            self._small_reads += 1
+            if self._small_reads >= 4:
+                self._small_reads = 0
+                self._read_size = max(self._read_size // 2, self.min_read_size)
+        else:
+            self._small_reads = 0
+
     def pause_reading(self):
-        if self._closing:
-            raise RuntimeError("Cannot pause_reading() when closing")
-        if self._paused:
-            raise RuntimeError("Already paused")
+        # Like asyncio's own transports, pausing or resuming a transport
+        # that is already paused or reading does nothing
+        if not self.is_reading():
+            return
         self._paused = True
 
     def resume_reading(self):
-        if not self._paused:
-            raise RuntimeError("Not paused")
-        self._paused = False
-        if self._closing:
+        if self._closing or not self._paused:
             return
+        self._paused = False
         self._loop.call_soon(self._loop_reading, self._read_fut)
 
     def _close_read(self):
@@ -178,6 +266,7 @@ class ReadTransport(BaseTransport, transports.ReadTransport):
                 return
 
             if data is not None:
+                self._adapt_read_size(data if isinstance(data, int) else len(data))
                 self._submit_read_data(data)
 
             if data == b"" or data == 0:
@@ -185,7 +274,7 @@ class ReadTransport(BaseTransport, transports.ReadTransport):
                 return
 
             # Reschedule a new read
-            self._read_fut = self._create_read_future(self.max_size)
+            self._read_fut = self._create_read_future(self._read_size)
             self._cancelable.add(self._read_fut)
         except ConnectionAbortedError as exc:
             if not self._closing:
@@ -225,8 +314,19 @@ class WriteTransport(BaseTransport, transports._FlowControlMixin):
     def get_write_buffer_size(self):
         return len(self._write_buffer)
 
+    def _write_pending(self):
+        return self._write_fut is not None
+
+    def _write_drained(self):
+        if len(self._drained_callbacks) > 0:
+            for callback in self._drained_callbacks:
+                callback()
+            self._drained_callbacks.clear()
+
+        self._maybe_resume_protocol()
+
     def _close_write(self):
-        if self._write_fut is not None:
+        if self._write_pending():
             self._closing_delayed = True
 
             def transport_write_done_callback():
@@ -284,12 +384,7 @@ class WriteTransport(BaseTransport, transports._FlowControlMixin):
                 data = self._buffer_pop_data()
 
             if not data:
-                if len(self._drained_callbacks) > 0:
-                    for callback in self._drained_callbacks:
-                        callback()
-                    self._drained_callbacks.clear()
-
-                self._maybe_resume_protocol()
+                self._write_drained()
             else:
                 self._write_fut = self._create_write_future(data)
                 self._cancelable.add(self._write_fut)
@@ -331,17 +426,12 @@ class Transport(ReadTransport, WriteTransport):
 
         BaseTransport.close(self)
 
-
-class SocketTransport(Transport):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
     def write_eof(self):
         if self._closing or self._eof_written:
             return
         self._eof_written = True
 
-        if self._write_fut is None:
+        if not self._write_pending():
             self._sock.shutdown(socket.SHUT_WR)
         else:
 
@@ -352,39 +442,476 @@ class SocketTransport(Transport):
             self._drained_callbacks.add(transport_write_eof_callback)
 
 
-class DatagramTransport(Transport, transports.DatagramTransport):
+class FutureSocketTransport(Transport):
+    # Every read and write waits for a new `sock_recv()`/`sock_sendall()`
+    # future. This is slower than the watches `SocketTransport` keeps, and is
+    # only used when a loop is created with `transport_engine="futures"`.
+
+    # `loop.sendfile()` reads the file into a buffer and writes it
+    _sendfile_compatible = constants._SendfileMode.FALLBACK
+
+
+class _WatchTransport(Transport):
+    # Rather than waiting for a new future for every operation, sockets are
+    # read from a single watch that stays attached until reading is paused or
+    # the transport is closed, and written from another one whenever there is
+    # data that could not be sent right away
+
+    # How much is read each time the socket becomes readable, as a number of
+    # reads and a number of bytes (`None` meaning no limit). Reading again
+    # until the socket runs dry saves a trip through the loop per read on
+    # busy sockets, at the expense of the other sockets on the loop.
+    max_reads = 1
+    max_bytes = None
+
     _buffer_factory = collections.deque
 
+    def __init__(self, *args, **kwargs):
+        self._read_handle = None
+        self._write_handle = None
+        self._write_buffer_size = 0
+        # The protocol's callbacks all run in this copy of the context the
+        # transport was created in, like with asyncio's own transports
+        self._context = contextvars.copy_context()
+        super().__init__(*args, **kwargs)
+
+    def set_read_budget(self, max_reads=1, max_bytes=None):
+        """Set how much is read each time the socket becomes readable.
+
+        Reading stops once either limit has been reached, or as soon as
+        no more data is available. Pass `None` for no limit.
+        """
+        if max_reads is not None and max_reads < 1:
+            raise ValueError("max_reads must be at least 1 or None")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1 or None")
+        self.max_reads = max_reads
+        self.max_bytes = max_bytes
+
+    def pause_reading(self):
+        super().pause_reading()
+        self._stop_reading()
+
+    def _close_read(self):
+        super()._close_read()
+        self._stop_reading()
+
+    def _force_close(self, exc):
+        # The watches have to go before the socket gets closed
+        self._stop_reading()
+        self._stop_writing()
+        self._write_buffer.clear()
+        self._write_buffer_size = 0
+        super()._force_close(exc)
+
+    def _loop_reading(self, fut=None):
+        if self._paused or self._closing or self._read_handle is not None:
+            return
+
+        self._read_handle = self._loop._read_watch(
+            self._sock, self._read_ready, context=self._context
+        )
+
+    def _stop_reading(self):
+        if self._read_handle is not None:
+            self._read_handle.cancel()
+            self._read_handle = None
+
+    def _read_budget_spent(self, reads, nbytes):
+        return (self.max_reads is not None and reads >= self.max_reads) or (
+            self.max_bytes is not None and nbytes >= self.max_bytes
+        )
+
+    def _read_failed(self, exc):
+        if isinstance(exc, ConnectionAbortedError):
+            if not self._closing:
+                self._fatal_error(exc, "Fatal read error on socket transport")
+        elif isinstance(exc, ConnectionResetError):
+            self._force_close(exc)
+        else:
+            self._fatal_error(exc, "Fatal read error on socket transport")
+
+    def get_write_buffer_size(self):
+        return self._write_buffer_size
+
+    def _write_pending(self):
+        return bool(self._write_buffer)
+
+    def _start_writing(self):
+        if self._write_handle is None:
+            self._write_handle = self._loop._write_watch(
+                self._sock, self._write_ready, context=self._context
+            )
+
+    def _stop_writing(self):
+        if self._write_handle is not None:
+            self._write_handle.cancel()
+            self._write_handle = None
+
+    def _write_failed(self, exc):
+        if isinstance(exc, ConnectionResetError):
+            self._force_close(exc)
+        else:
+            self._fatal_error(exc, "Fatal write error on socket transport")
+
+
+class SocketTransport(_WatchTransport):
+    # Data that could not be sent right away is queued, and flushed with as
+    # few `sendmsg()` calls as possible. Large immutable payloads are queued
+    # as memoryviews without being copied. Anything else is copied, as the
+    # caller is free to reuse a mutable buffer once `write()` has returned,
+    # and consecutive small chunks are merged into a single `bytearray`.
+    _copy_threshold = 2048
+
+    # `loop.sendfile()` sends files with `os.sendfile()` once the data that
+    # has already been written has been sent
+    _sendfile_compatible = constants._SendfileMode.TRY_NATIVE
+
+    # With auto-corking, even the first write waits for the end of the
+    # callback that made it, so that everything written until then (such as
+    # a header and a body written separately) goes out in a single system call
+    auto_cork = False
+
+    def __init__(self, *args, **kwargs):
+        self._write_tail = None
+        self._writes_deferred = False
+        self._empty_waiter = None
+        super().__init__(*args, **kwargs)
+
+    def _force_close(self, exc):
+        self._write_tail = None
+        if self._empty_waiter is not None and not self._empty_waiter.done():
+            self._empty_waiter.set_exception(
+                ConnectionError("Connection is closed by peer")
+            )
+        super()._force_close(exc)
+
+    def _make_empty_waiter(self):
+        if self._empty_waiter is not None:
+            raise RuntimeError("Empty waiter is already set")
+        self._empty_waiter = self._loop.create_future()
+        if not self._write_pending():
+            self._empty_waiter.set_result(None)
+        return self._empty_waiter
+
+    def _reset_empty_waiter(self):
+        self._empty_waiter = None
+
+    def set_auto_cork(self, enabled=True):
+        """Set whether writes are held back until the current callback returns.
+
+        Everything written in the meantime is then sent together, which
+        saves system calls and packets for protocols that issue many small
+        writes in a row, at the expense of a little latency.
+        """
+        self.auto_cork = enabled
+
+    def _read_ready(self):
+        # The watch keeps firing for as long as data is waiting, so errors
+        # raised by the protocol close the transport, like with asyncio's own
+        # transports, rather than leaving the data in the socket
+        reads = 0
+        total = 0
+        while True:
+            if self._alloc_read_buffers:
+                try:
+                    buf = self._protocol.get_buffer(self._read_size)
+                    size = len(buf)
+                    if not size:
+                        raise RuntimeError("get_buffer() returned an empty buffer")
+                except (SystemExit, KeyboardInterrupt):
+                    raise
+                except BaseException as exc:
+                    self._fatal_error(
+                        exc, "Fatal error: protocol.get_buffer() call failed."
+                    )
+                    return
+
+            try:
+                if self._alloc_read_buffers:
+                    data = nbytes = self._sock.recv_into(buf)
+                else:
+                    size = self._read_size
+                    data = self._sock.recv(size)
+                    nbytes = len(data)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as exc:
+                self._read_failed(exc)
+                return
+
+            if nbytes == 0:
+                # No need to keep watching the socket after end-of-file
+                self._stop_reading()
+                callback = "eof_received"
+            else:
+                self._adapt_read_size(nbytes)
+                callback = (
+                    "buffer_updated" if self._alloc_read_buffers else "data_received"
+                )
+
+            try:
+                self._submit_read_data(data)
+            except (SystemExit, KeyboardInterrupt):
+                raise
+            except BaseException as exc:
+                self._fatal_error(
+                    exc, f"Fatal error: protocol.{callback}() call failed."
+                )
+                return
+
+            reads += 1
+            total += nbytes
+            if (
+                # A short read means that the socket has been drained
+                nbytes < size
+                # Paused or closed by the protocol, or end-of-file
+                or self._read_handle is None
+                or self._read_budget_spent(reads, total)
+            ):
+                return
+
+    def write(self, data):
+        if self._eof_written:
+            raise RuntimeError("write_eof() already called")
+        if self._empty_waiter is not None:
+            raise RuntimeError("unable to write; sendfile is in progress")
+
+        # Ignore empty data sets or requests to write to a dying connection
+        if not data or self._closing:
+            return
+
+        if self.auto_cork and not self._write_pending():
+            self._defer_writes()
+        elif not self._write_buffer and not self._writes_deferred:
+            # Try to send the data right away, and only queue what's left
+            try:
+                nbytes = self._sock.send(data)
+            except (BlockingIOError, InterruptedError):
+                nbytes = 0
+            except OSError as exc:
+                self._write_failed(exc)
+                return
+
+            data = memoryview(data).cast("B")[nbytes:]
+            if not data:
+                self._defer_writes()
+                return
+            self._start_writing()
+
+        self._buffer_add_data(data)
+        self._maybe_pause_protocol()  # From _FlowControlMixin
+
+    def writelines(self, list_of_data):
+        if self._eof_written:
+            raise RuntimeError("write_eof() already called")
+        if self._empty_waiter is not None:
+            raise RuntimeError("unable to write; sendfile is in progress")
+
+        if self._closing:
+            return
+
+        idle = not self._write_pending()
+
+        # Joining is by far the fastest way to queue many small chunks, but
+        # would copy large payloads. Short lists (such as a header followed by
+        # a body) are queued chunk by chunk instead.
+        if isinstance(list_of_data, (list, tuple)) and len(list_of_data) <= 4:
+            for data in list_of_data:
+                if data:
+                    self._buffer_add_data(data)
+        else:
+            data = b"".join(list_of_data)
+            if data:
+                self._buffer_add_data(data)
+
+        if idle and self._write_buffer and self.auto_cork:
+            self._defer_writes()
+        elif idle and self._write_buffer:
+            # Send as much as possible right away, in a single system call
+            if self._send_buffer():
+                if self._write_buffer:
+                    self._start_writing()
+                else:
+                    self._defer_writes()
+        self._maybe_pause_protocol()
+
+    def _write_pending(self):
+        return super()._write_pending() or self._writes_deferred
+
+    def _write_drained(self):
+        if self._empty_waiter is not None and not self._empty_waiter.done():
+            self._empty_waiter.set_result(None)
+        super()._write_drained()
+
+    def _defer_writes(self):
+        # After sending data right away, further writes are queued until the
+        # loop comes around again, so that bursts of small writes still end
+        # up being sent together. With auto-corking, all writes are queued
+        # until the callback that made them has returned.
+        self._writes_deferred = True
+        if self.auto_cork:
+            self._loop._call_after_dispatch(self._flush_deferred_writes)
+        else:
+            self._loop.call_soon(self._flush_deferred_writes)
+
+    def _flush_deferred_writes(self):
+        self._writes_deferred = False
+        if self._write_handle is None and not self._closed:
+            self._write_ready()
+            if self._write_buffer:
+                self._start_writing()
+
+    def _buffer_add_data(self, data):
+        if type(data) is not bytes:
+            data = memoryview(data).cast("B")
+        nbytes = len(data)
+        self._write_buffer_size += nbytes
+
+        tail = self._write_tail
+        if nbytes >= self._copy_threshold and (type(data) is bytes or data.readonly):
+            self._write_buffer.append(memoryview(data))
+            self._write_tail = None
+        elif tail is not None:
+            tail += data
+        else:
+            self._write_tail = bytearray(data)
+            self._write_buffer.append(self._write_tail)
+
+    def _buffer_consume(self, nbytes):
+        self._write_buffer_size -= nbytes
+        while nbytes > 0:
+            data = self._write_buffer[0]
+            if data is self._write_tail:
+                # Can't be extended once it's been sent from (even partially)
+                self._write_tail = None
+            if nbytes >= len(data):
+                self._write_buffer.popleft()
+                nbytes -= len(data)
+            else:
+                self._write_buffer[0] = memoryview(data)[nbytes:]
+                nbytes = 0
+
+    def _send_buffer(self):
+        """Send as much of the write buffer as the socket accepts.
+
+        Returns `False` if the transport had to be closed.
+        """
+        if not self._write_buffer:
+            return True
+
+        try:
+            if _HAS_SENDMSG:
+                nbytes = self._sock.sendmsg(
+                    itertools.islice(self._write_buffer, SC_IOV_MAX)
+                )
+            else:
+                nbytes = self._sock.send(self._write_buffer[0])
+        except (BlockingIOError, InterruptedError):
+            return True
+        except OSError as exc:
+            self._write_failed(exc)
+            return False
+
+        self._buffer_consume(nbytes)
+        return True
+
+    def _write_ready(self):
+        if not self._send_buffer():
+            return
+
+        if not self._write_buffer:
+            self._stop_writing()
+            self._write_drained()
+        else:
+            self._maybe_resume_protocol()
+
+
+class DatagramTransport(_WatchTransport, transports.DatagramTransport):
+    # Datagrams that don't fit into the read size get truncated
+    adaptive_read_size = False
+
+    # The number of datagrams read each time the socket becomes readable for
+    # protocols that receive them in batches, unless a read budget is set
+    batch_max_reads = 64
+
     def __init__(self, loop, sock, protocol, address=None, *args, **kwargs):
         self._address = address
+        self._read_budget_set = False
         super().__init__(loop, sock, protocol, *args, **kwargs)
 
-    def _create_read_future(self, size):
-        return self._loop.sock_recvfrom(self._sock, size)
+    def set_read_budget(self, max_reads=1, max_bytes=None):
+        super().set_read_budget(max_reads, max_bytes)
+        self._read_budget_set = True
 
-    def _submit_read_data(self, args):
-        (data, addr) = args
+    def can_write_eof(self):
+        return False
 
-        self._protocol.datagram_received(data, addr)
+    def write_eof(self):
+        # Datagram sockets can't be shut down for writing
+        self.close()
 
-    def _create_write_future(self, args):
-        (data, addr) = args
+    def set_protocol(self, protocol):
+        # Protocols may receive all the datagrams read at once in a single call
+        self._batch_datagrams = hasattr(protocol, "datagrams_received")
+        if not self._read_budget_set:
+            self.max_reads = (
+                self.batch_max_reads
+                if self._batch_datagrams
+                else DatagramTransport.max_reads
+            )
+        super().set_protocol(protocol)
 
-        if self._address:
-            return self._loop.sock_sendall(self._sock, data)
+    def _read_ready(self):
+        batch = []
+        reads = 0
+        total = 0
+        error = None
+        while True:
+            try:
+                data, addr = self._sock.recvfrom(self._read_size)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as exc:
+                error = exc
+                break
+
+            if self._batch_datagrams:
+                batch.append((data, addr))
+            else:
+                self._protocol.datagram_received(data, addr)
+
+            reads += 1
+            total += len(data)
+            if (
+                # Paused or closed by the protocol
+                self._read_handle is None
+                or self._read_budget_spent(reads, total)
+            ):
+                break
+
+        if batch:
+            self._protocol.datagrams_received(batch)
+        if error is not None:
+            self._read_failed(error)
+
+    def _send(self, data, addr):
+        if self._address or addr is None:
+            self._sock.send(data)
         else:
-            return self._loop.sock_sendallto(self._sock, data, addr)
+            self._sock.sendto(data, addr)
 
     def _buffer_add_data(self, args):
         (data, addr) = args
 
-        self._write_buffer.append((bytes(data), addr))
-
-    def _buffer_pop_data(self):
-        if len(self._write_buffer) > 0:
-            return self._write_buffer.popleft()
-        else:
-            return None
+        # Immutable data can be queued as is, but the caller is free to reuse
+        # a mutable buffer once `sendto()` has returned
+        if type(data) is not bytes:
+            data = memoryview(data).cast("B")
+            if not data.readonly:
+                data = bytes(data)
+        self._write_buffer.append((data, addr))
+        self._write_buffer_size += len(data)
 
     def write(self, data, addr=None):
         if not isinstance(data, (bytes, bytearray, memoryview)):
@@ -399,11 +926,41 @@ class DatagramTransport(Transport, transports.DatagramTransport):
         if self._address and addr not in (None, self._address):
             raise ValueError(f"Invalid address: must be None or {self._address}")
 
-        # Do not copy the data yet, as we might be able to send it synchronously
-        super().write((data, addr))
+        if not self._write_buffer:
+            # Try to send the datagram right away, and only queue it (and
+            # copy it) if the socket is not ready
+            try:
+                self._send(data, addr)
+                return
+            except (BlockingIOError, InterruptedError):
+                self._start_writing()
+            except OSError as exc:
+                self._write_failed(exc)
+                return
+
+        self._buffer_add_data((data, addr))
+        self._maybe_pause_protocol()  # From _FlowControlMixin
 
     sendto = write
 
+    def _write_ready(self):
+        # Send as many queued datagrams as the socket accepts
+        while self._write_buffer:
+            (data, addr) = self._write_buffer[0]
+            try:
+                self._send(data, addr)
+            except (BlockingIOError, InterruptedError):
+                self._maybe_resume_protocol()
+                return
+            except OSError as exc:
+                self._write_failed(exc)
+                return
+            self._write_buffer.popleft()
+            self._write_buffer_size -= len(data)
+
+        self._stop_writing()
+        self._write_drained()
+
 
 class PipeReadTransport(ReadTransport):
     def __init__(self, loop, channel, protocol, waiter, extra):
@@ -412,28 +969,31 @@ class PipeReadTransport(ReadTransport):
         super().__init__(loop, None, protocol, waiter, extra)
 
     def _create_read_future(self, size):
-        if self._alloc_read_buffers:
-            self._read_buffer = self._protocol.get_buffer(size)
-            size = len(self._read_buffer)
-        return self._loop._channel_read(self._channel, size)
+        if not self._alloc_read_buffers:
+            return self._loop._channel_read(self._channel, size)
+
+        self._read_buffer = self._protocol.get_buffer(size)
+        if not _HAS_READV:
+            return self._loop._channel_read(self._channel, len(self._read_buffer))
+
+        # Read from the file descriptor straight into the protocol's buffer,
+        # as `GLib.IOChannel.read()` can only return a new bytes object
+        fd = self._channel.unix_get_fd()
+        view = memoryview(self._read_buffer).cast("B")
+
+        def read_func(channel, nbytes):
+            return _readv_fd(fd, view)
+
+        return self._loop._channel_read(self._channel, len(view), read_func)
 
     def _submit_read_data(self, data):
-        assert isinstance(data, bytes)
-        if data != b"" and data != 0:
-            if self._alloc_read_buffers:
-                # FIXME: GLib does not actually expose the equivalent to
-                #       `recv_into` in its channel interface, so we have to
-                #       add an extra copy here rather than avoiding one
-                self._read_buffer[0 : len(data)] = data
-                self._protocol.buffer_updated(len(data))
-                self._read_buffer = None
-            else:
-                self._protocol.data_received(data)
-        else:
-            self._read_buffer = None
-            keep_open = self._protocol.eof_received()
-            if not keep_open:
-                self.close()
+        if self._alloc_read_buffers and isinstance(data, bytes):
+            # GLib does not actually expose the equivalent to `recv_into` in
+            # its channel interface, so without `os.readv()` we have to add an
+            # extra copy here rather than avoiding one
+            self._read_buffer[0 : len(data)] = data
+            data = len(data)
+        super()._submit_read_data(data)
 
     def _force_close_async(self, exc):
         try:
@@ -449,7 +1009,10 @@ class PipeWriteTransport(WriteTransport):
         super().__init__(loop, None, protocol, waiter, extra)
 
     def _create_write_future(self, data):
-        return self._loop._channel_write(self._channel, data)
+        # Write to the file descriptor directly, as `GLib.IOChannel.write()`
+        # only accepts bytes, which would take a copy of the data on every
+        # attempt
+        return self._loop._channel_write(self._channel, data, _write_fd)
 
     def _force_close_async(self, exc):
         try:
@@ -30,8 +30,14 @@ def gtk_policy():
 
 
 @pytest.fixture(scope="function")
-def glib_loop(glib_policy):
-    loop = glib_policy.new_event_loop()
+def glib_loop(glib_policy, request):
+    # Tests can be run with a specific socket transport engine by
+    # parametrizing this fixture indirectly
+    if hasattr(request, "param"):
+        loop = glib_policy.EventLoopCls(transport_engine=request.param)
+        loop._policy = glib_policy
+    else:
+        loop = glib_policy.new_event_loop()
     setup_test_loop(loop)
     yield loop
     check_loop_failures(loop)
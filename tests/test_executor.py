@@ -0,0 +1,150 @@
+import asyncio
+import sys
+import threading
+import time
+from unittest import mock, skipIf
+
+import pytest
+
+
+def test_run_in_executor_default(glib_loop):
+    from gbulb import ThreadPool
+
+    async def run():
+        assert await glib_loop.run_in_executor(None, sum, [1, 2, 3]) == 6
+        assert isinstance(glib_loop._default_executor, ThreadPool)
+
+        with pytest.raises(ZeroDivisionError):
+            await glib_loop.run_in_executor(None, divmod, 1, 0)
+
+        with pytest.raises(RuntimeError, match="StopIteration"):
+            await glib_loop.run_in_executor(None, next, iter([]))
+
+    glib_loop.run_until_complete(run())
+
+
+def test_run_in_executor_batches(glib_loop):
+    from gbulb import ThreadPool
+
+    executor = ThreadPool(max_workers=4)
+    glib_loop.set_default_executor(executor)
+    barrier = threading.Barrier(4)
+
+    async def run():
+        with mock.patch.object(
+            glib_loop,
+            "_deliver_executor_results",
+            wraps=glib_loop._deliver_executor_results,
+        ) as deliver:
+            # All the jobs finish before the loop gets a chance to deliver
+            # any of them
+            results = [glib_loop.run_in_executor(None, barrier.wait) for _ in range(4)]
+            time.sleep(0.1)
+            assert sorted(await asyncio.gather(*results)) == [0, 1, 2, 3]
+        assert deliver.call_count == 1
+        assert len(executor._threads) == 4
+
+    glib_loop.run_until_complete(run())
+
+
+def test_run_in_executor_max_workers(glib_loop):
+    from gbulb import ThreadPool
+
+    executor = ThreadPool(max_workers=2)
+    threads = set()
+
+    def job():
+        threads.add(threading.get_ident())
+        time.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(
+            *[glib_loop.run_in_executor(executor, job) for _ in range(10)]
+        )
+
+    glib_loop.run_until_complete(run())
+    executor.shutdown()
+    assert len(threads) <= 2
+
+
+def test_run_in_executor_cancelled(glib_loop):
+    from gbulb import ThreadPool
+
+    executor = ThreadPool(max_workers=1)
+    release = threading.Event()
+    called = []
+
+    async def run():
+        blocker = glib_loop.run_in_executor(executor, release.wait)
+        cancelled = glib_loop.run_in_executor(executor, called.append, 1)
+        cancelled.cancel()
+        release.set()
+        await blocker
+        await glib_loop.run_in_executor(executor, called.append, 2)
+
+    glib_loop.run_until_complete(run())
+    executor.shutdown()
+    assert called == [2]
+
+
+def test_run_in_executor_other_executor(glib_loop):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        result = glib_loop.run_until_complete(
+            glib_loop.run_in_executor(executor, sum, [1, 2])
+        )
+    assert result == 3
+
+
+@skipIf(sys.version_info < (3, 9), "shutdown_default_executor() needs Python 3.9")
+def test_shutdown_default_executor(glib_loop):
+    async def run():
+        await glib_loop.run_in_executor(None, time.sleep, 0)
+        await glib_loop.shutdown_default_executor()
+        with pytest.raises(RuntimeError):
+            glib_loop.run_in_executor(None, time.sleep, 0)
+
+    glib_loop.run_until_complete(run())
+
+
+def test_thread_pool_submit():
+    from gbulb import ThreadPool
+
+    executor = ThreadPool(max_workers=1)
+    release = threading.Event()
+    blocker = executor.submit(release.wait)
+    future = executor.submit(divmod, 7, 2)
+    queued = executor.submit(divmod, 1, 0)
+    assert queued.cancel()
+    release.set()
+
+    assert future.result(timeout=5) == (3, 1)
+    assert blocker.result(timeout=5)
+
+    executor.shutdown()
+    with pytest.raises(RuntimeError):
+        executor.submit(divmod, 1, 1)
+    assert not any(thread.is_alive() for thread in executor._threads)
+
+
+def test_thread_pool_shutdown_cancel_futures():
+    from gbulb import ThreadPool
+
+    executor = ThreadPool(max_workers=1)
+    release = threading.Event()
+    blocker = executor.submit(release.wait)
+    time.sleep(0.01)
+    queued = executor.submit(divmod, 1, 1)
+
+    threading.Timer(0.05, release.set).start()
+    executor.shutdown(cancel_futures=True)
+    assert blocker.result()
+    assert queued.cancelled()
+
+
+def test_thread_pool_invalid():
+    from gbulb import ThreadPool
+
+    with pytest.raises(ValueError):
+        ThreadPool(max_workers=0)
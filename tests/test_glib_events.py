@@ -1,7 +1,9 @@
 import asyncio
 import os
+import socket
 import sys
 import tempfile
+import threading
 from unittest import mock, skipIf
 
 import pytest
@@ -39,6 +41,68 @@ class TestGLibEventLoopPolicy:
 
         assert b._application is None
 
+    def test_new_event_loop_thread_default_context(self, glib_policy):
+        context = GLib.MainContext()
+        loops = []
+
+        def thread_main():
+            context.push_thread_default()
+            try:
+                loops.append(glib_policy.new_event_loop())
+            finally:
+                context.pop_thread_default()
+            loops.append(glib_policy.new_event_loop())
+
+        glib_policy.new_event_loop()  # The main thread's loop
+        thread = threading.Thread(target=thread_main)
+        thread.start()
+        thread.join()
+
+        assert loops[0]._context == context
+        assert loops[1]._context != context
+        assert loops[1]._context != GLib.main_context_default()
+        for loop in loops:
+            loop.close()
+
+    def test_thread_loop_gio(self, glib_policy):
+        results = []
+
+        async def load(path):
+            # GIO operations started by the loop's callbacks complete on the
+            # loop's own context, in the loop's own thread
+            loop = asyncio.get_event_loop()
+            assert GLib.MainContext.get_thread_default() == loop._context
+            future = loop.create_future()
+
+            def done(file, result):
+                results.append(threading.get_ident())
+                future.set_result(file.load_contents_finish(result)[1])
+
+            Gio.File.new_for_path(path).load_contents_async(None, done)
+            return await future
+
+        def thread_main(path):
+            loop = glib_policy.new_event_loop()
+            try:
+                results.append(loop.run_until_complete(load(path)))
+            finally:
+                loop.close()
+            results.append(GLib.MainContext.get_thread_default())
+            results.append(threading.get_ident())
+
+        glib_policy.new_event_loop()  # The main thread's loop
+        with tempfile.NamedTemporaryFile() as file:
+            file.write(b"contents")
+            file.flush()
+            thread = threading.Thread(target=thread_main, args=(file.name,))
+            thread.start()
+            thread.join(5)
+
+        ident, contents, context, thread_ident = results
+        assert ident == thread_ident
+        assert contents == b"contents"
+        assert context is None
+
 
 class TestGLibHandle:
     def test_attachment_order(self, glib_loop):
@@ -67,6 +131,43 @@ class TestGLibHandle:
 
         assert call_manager.mock_calls == expected_calls
 
+    @skipIf(
+        is_windows, "Waiting on raw file descriptors only works for sockets on Windows"
+    )
+    def test_context(self, glib_loop):
+        import contextvars
+
+        var = contextvars.ContextVar("var")
+        seen = None
+
+        def callback():
+            nonlocal seen
+            seen = var.get()
+            glib_loop.stop()
+
+        rfd, wfd = os.pipe()
+        try:
+            var.set("added")
+            glib_loop.add_writer(wfd, callback)
+            var.set("running")
+            glib_loop.run_forever()
+        finally:
+            glib_loop.remove_writer(wfd)
+            os.close(rfd)
+            os.close(wfd)
+
+        # User callbacks run in the context that was current when added
+        assert seen == "added"
+
+    def test_internal_context(self, glib_loop):
+        from gbulb.glib_events import _NO_CONTEXT
+
+        future = glib_loop._delayed(GLib.Idle())
+        assert future.handle._context is _NO_CONTEXT
+
+        glib_loop.run_until_complete(future)
+        assert future.result() is None
+
 
 async def no_op_coro():
     pass
@@ -215,6 +316,32 @@ class TestBaseGLibEventLoop:
         os.close(rfd)
         os.close(wfd)
 
+    @skipIf(
+        is_windows, "Waiting on raw file descriptors only works for sockets on Windows"
+    )
+    def test_add_reader_regular_file(self, glib_loop):
+        # Regular files can't be polled by epoll, but they are always ready
+        called = []
+        with tempfile.TemporaryFile() as f:
+            f.write(b"data")
+            f.seek(0)
+
+            def callback():
+                called.append(os.read(f.fileno(), 4))
+                glib_loop.remove_reader(f)
+                glib_loop.add_writer(f, writable)
+
+            def writable():
+                assert glib_loop.remove_writer(f)
+                assert not glib_loop.remove_writer(f)
+                glib_loop.stop()
+
+            glib_loop.add_reader(f, callback)
+            glib_loop.run_forever()
+
+        assert called == [b"data"]
+        assert not glib_loop._fd_watches
+
     @skipIf(
         is_windows, "Waiting on raw file descriptors only works for sockets on Windows"
     )
@@ -283,6 +410,93 @@ class TestBaseGLibEventLoop:
 
         assert called, "call_at handler didn't fire"
 
+    def test_call_later_order(self, glib_loop):
+        items = []
+
+        glib_loop.call_later(0.03, items.append, 3)
+        glib_loop.call_later(0.01, items.append, 1)
+        glib_loop.call_later(0.02, items.append, 2)
+        glib_loop.call_later(0.04, glib_loop.stop)
+        glib_loop.run_forever()
+
+        assert items == [1, 2, 3]
+        assert not glib_loop._scheduled
+
+    def test_call_later_earlier_deadline(self, glib_loop):
+        glib_loop.call_later(10, glib_loop.stop)
+
+        s = glib_loop.time()
+        glib_loop.call_later(0.01, glib_loop.stop)
+        glib_loop.run_forever()
+
+        assert glib_loop.time() - s < 1
+
+    def test_call_later_cancel(self, glib_loop):
+        items = []
+
+        handles = [glib_loop.call_later(0.01, items.append, i) for i in range(200)]
+        for handle in handles[:150]:
+            handle.cancel()
+        assert len(glib_loop._scheduled) == 200
+        assert glib_loop._timer_cancelled_count == 150
+
+        glib_loop.call_later(0.02, glib_loop.stop)
+        glib_loop.run_forever()
+
+        assert items == list(range(150, 200))
+        assert not glib_loop._scheduled
+        assert glib_loop._timer_cancelled_count == 0
+
+    def test_call_later_cancel_purge(self, glib_loop):
+        handles = [glib_loop.call_later(10, lambda: None) for i in range(200)]
+        for handle in handles[:150]:
+            handle.cancel()
+
+        glib_loop.call_soon(glib_loop.stop)
+        glib_loop.run_forever()
+
+        # Cancelled timers are purged in bulk once they are the majority
+        assert len(glib_loop._scheduled) == 50
+        assert glib_loop._timer_cancelled_count == 0
+
+    def test_call_later_not_early(self, glib_loop):
+        late = []
+
+        def handler(when):
+            late.append(glib_loop.time() - when)
+            if len(late) == 20:
+                glib_loop.stop()
+
+        for i in range(20):
+            delay = 0.0001 * (i + 1) + 0.00000025
+            glib_loop.call_later(delay, handler, glib_loop.time() + delay)
+        glib_loop.run_forever()
+
+        assert min(late) >= 0
+
+    def test_select_timeout(self):
+        from gbulb.glib_events import GLibEventLoop
+
+        # Use a private context, so that nothing else can wake it up
+        loop = GLibEventLoop()
+        try:
+            s = loop.time()
+            assert loop.select(0.05) == ()
+            e = loop.time()
+        finally:
+            loop.close()
+
+        assert 1 > e - s >= 0.05
+
+    def test_select_timeout_reuses_source(self, glib_loop):
+        glib_loop.select(0.001)
+        source = glib_loop._select_source
+        assert source.deadline == -1
+
+        glib_loop.select(0.001)
+        assert glib_loop._select_source is source
+        assert source.deadline == -1
+
     def test_call_soon_no_coroutine(self, glib_loop):
         with pytest.raises(TypeError):
             glib_loop.call_soon(no_op_coro)
@@ -312,9 +526,148 @@ class TestBaseGLibEventLoop:
 
     def test_call_soon_priority(self, glib_loop):
         h = glib_loop.call_soon(lambda: None)
-        assert h._source.get_priority() == GLib.PRIORITY_DEFAULT
+        assert glib_loop._callback_source.get_priority() == GLib.PRIORITY_DEFAULT
         h.cancel()
 
+    def test_call_soon_cancel(self, glib_loop):
+        items = []
+
+        handles = [glib_loop.call_soon(items.append, i) for i in range(10)]
+        glib_loop.call_soon(glib_loop.stop)
+
+        handles[3].cancel()
+        handles[7].cancel()
+
+        glib_loop.run_forever()
+
+        assert items == [0, 1, 2, 4, 5, 6, 8, 9]
+        assert not glib_loop._ready
+
+    def test_call_soon_reentrant(self, glib_loop):
+        items = []
+
+        def handler(i):
+            items.append(i)
+            if i < 3:
+                glib_loop.call_soon(handler, i + 10)
+
+        for i in range(5):
+            glib_loop.call_soon(handler, i)
+        glib_loop.call_soon(lambda: glib_loop.call_soon(glib_loop.stop))
+
+        glib_loop.run_forever()
+
+        # Callbacks scheduled from a callback run after the current batch
+        assert items == [0, 1, 2, 3, 4, 10, 11, 12]
+
+    @skipIf(
+        is_windows, "Waiting on raw file descriptors only works for sockets on Windows"
+    )
+    def test_add_reader_reentrant(self, glib_loop):
+        # A reader callback that runs the loop recursively (like a modal
+        # dialog would) still lets the other readers fire
+        results = []
+        rfd1, wfd1 = os.pipe()
+        rfd2, wfd2 = os.pipe()
+
+        def first():
+            glib_loop.remove_reader(rfd1)
+            timeout = glib_loop.call_later(1, timed_out)
+            os.write(wfd2, b"x")
+            glib_loop.run()
+            timeout.cancel()
+            glib_loop.stop()
+
+        def second():
+            glib_loop.remove_reader(rfd2)
+            results.append("second")
+            glib_loop.stop()
+
+        def timed_out():
+            results.append("timeout")
+            glib_loop.stop()
+
+        glib_loop.add_reader(rfd1, first)
+        glib_loop.add_reader(rfd2, second)
+        os.write(wfd1, b"x")
+        try:
+            glib_loop.run()
+        finally:
+            for fd in (rfd1, wfd1, rfd2, wfd2):
+                os.close(fd)
+
+        assert results == ["second"]
+
+    def test_call_soon_from_thread(self, glib_loop):
+        import threading
+
+        called = False
+
+        def handler():
+            nonlocal called
+            called = True
+            glib_loop.stop()
+
+        def thread_main():
+            glib_loop.call_soon(handler)
+
+        # Make sure the loop is blocked in poll() before the call is made
+        glib_loop.call_later(0.01, threading.Thread(target=thread_main).start)
+        timeout = glib_loop.call_later(5, glib_loop.stop)
+        glib_loop.run_forever()
+        timeout.cancel()
+
+        assert called, "call_soon from another thread didn't wake up the loop"
+
+    def test_call_soon_threadsafe_from_thread(self, glib_loop):
+        import threading
+
+        called = False
+
+        def handler():
+            nonlocal called
+            called = True
+            glib_loop.stop()
+
+        def thread_main():
+            glib_loop.call_soon_threadsafe(handler)
+
+        # Make sure the loop is blocked in poll() before the call is made
+        glib_loop.call_later(0.01, threading.Thread(target=thread_main).start)
+        timeout = glib_loop.call_later(5, glib_loop.stop)
+        glib_loop.run_forever()
+        timeout.cancel()
+
+        assert called, "call_soon_threadsafe didn't wake up the loop"
+
+    def test_call_soon_threadsafe_wakeups(self, glib_loop):
+        import threading
+
+        items = []
+
+        def thread_main(n):
+            for i in range(100):
+                glib_loop.call_soon_threadsafe(items.append, (n, i))
+
+        # The context is woken up once, however many callbacks get queued
+        # before the loop gets to run them
+        with mock.patch.object(GLib.MainContext, "wakeup") as wakeup:
+            threads = [
+                threading.Thread(target=thread_main, args=(n,)) for n in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert wakeup.call_count == 1
+
+        glib_loop.call_soon_threadsafe(glib_loop.stop)
+        glib_loop.run_forever()
+
+        assert len(items) == 400
+        for n in range(4):
+            assert [i for m, i in items if m == n] == list(range(100))
+
     @skipIf(
         is_windows, "Waiting on raw file descriptors only works for sockets on Windows"
     )
@@ -351,6 +704,42 @@ class TestBaseGLibEventLoop:
         assert not timeout_occurred
         assert i == expected_i
 
+    @skipIf(is_windows, "add_reader() and add_writer() use a selector on Unix")
+    def test_add_reader_and_writer_same_fd(self, glib_loop):
+        socks = [socket.socketpair() for _ in range(100)]
+        events = []
+
+        def callback(event):
+            events.append(event)
+            if event == "write":
+                glib_loop.remove_writer(socks[0][0])
+            else:
+                glib_loop.stop()
+
+        try:
+            for rsock, wsock in socks:
+                glib_loop.add_reader(rsock, callback, "read")
+
+            # A single source watches all of them
+            assert glib_loop._fd_source is not None
+            assert len(glib_loop._fd_selector.get_map()) == 100
+            handlers = set(glib_loop._handlers)
+
+            # Removing the writer leaves the reader of the same socket alone
+            glib_loop.add_writer(socks[0][0], callback, "write")
+            glib_loop.call_later(0.05, socks[0][1].send, b"x")
+            glib_loop.run_forever()
+            assert events == ["write", "read"]
+            assert glib_loop._handlers == handlers
+
+            for rsock, wsock in socks:
+                assert glib_loop.remove_reader(rsock)
+            assert not glib_loop._fd_selector.get_map()
+        finally:
+            for rsock, wsock in socks:
+                rsock.close()
+                wsock.close()
+
     def test_call_soon_threadsafe(self, glib_loop):
         called = False
 
@@ -539,6 +928,13 @@ def test_subprocesses_readline_without_closure(glib_loop):
     glib_loop.run_until_complete(run())
 
 
+# Tests that both socket transport engines have to pass
+transport_engines = pytest.mark.parametrize(
+    "glib_loop", ["readiness", "futures"], indirect=True
+)
+
+
+@transport_engines
 def test_sockets(glib_loop):
     server_done = asyncio.Event()
     server_done._loop = glib_loop
@@ -579,6 +975,7 @@ def test_sockets(glib_loop):
     glib_loop.run_until_complete(run())
 
 
+@transport_engines
 def test_unix_sockets(glib_loop):
     server_done = asyncio.Event()
     server_done._loop = glib_loop
@@ -615,3 +1012,1067 @@ def test_unix_sockets(glib_loop):
         assert server_success
 
     glib_loop.run_until_complete(run())
+
+
+def test_transport_engine_invalid():
+    from gbulb.glib_events import GLibEventLoop
+
+    with pytest.raises(ValueError, match="transport_engine"):
+        GLibEventLoop(transport_engine="threads")
+
+
+@transport_engines
+def test_socket_transport_engine(glib_loop, request):
+    from gbulb import transports
+
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(asyncio.Protocol, rsock)
+        expected = {
+            "readiness": transports.SocketTransport,
+            "futures": transports.FutureSocketTransport,
+        }[request.node.callspec.params["glib_loop"]]
+        assert type(transport) is expected
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+
+class RecordingProtocol(asyncio.Protocol):
+    def __init__(self):
+        self.data = b""
+        self.handles = set()
+        self.eof = asyncio.Event()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.data += data
+        self.handles.add(getattr(self.transport, "_read_handle", None))
+
+    def eof_received(self):
+        self.eof.set()
+
+
+def test_socket_transport_read_watch(glib_loop):
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, protocol = await glib_loop.connect_accepted_socket(
+            RecordingProtocol, rsock
+        )
+        protocol.eof._loop = glib_loop
+
+        for chunk in [b"a" * 100, b"b" * 100000, b"c"]:
+            wsock.sendall(chunk)
+            await asyncio.sleep(0.01)
+        wsock.shutdown(socket.SHUT_WR)
+        await protocol.eof.wait()
+
+        # The same watch delivered all chunks and was removed on end-of-file
+        assert protocol.data == b"a" * 100 + b"b" * 100000 + b"c"
+        assert len(protocol.handles) == 1
+        assert transport._read_handle is None
+
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+
+@transport_engines
+def test_socket_transport_pause_reading(glib_loop):
+    from gbulb.transports import SocketTransport
+
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, protocol = await glib_loop.connect_accepted_socket(
+            RecordingProtocol, rsock
+        )
+        watched = isinstance(transport, SocketTransport)
+        await asyncio.sleep(0.01)
+
+        transport.pause_reading()
+        transport.pause_reading()
+        assert not transport.is_reading()
+        if watched:
+            assert transport._read_handle is None
+        wsock.sendall(b"data")
+        await asyncio.sleep(0.01)
+        assert protocol.data == b""
+
+        transport.resume_reading()
+        transport.resume_reading()
+        assert transport.is_reading()
+        await asyncio.sleep(0.01)
+        assert protocol.data == b"data"
+
+        transport.close()
+        assert not transport.is_reading()
+        if watched:
+            assert transport._read_handle is None
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+
+@transport_engines
+def test_socket_transport_context(glib_loop):
+    import contextvars
+
+    var = contextvars.ContextVar("var", default=None)
+    seen = []
+
+    class Protocol(asyncio.Protocol):
+        def __init__(self):
+            seen.append(("factory", var.get()))
+            var.set("factory")
+
+        def data_received(self, data):
+            # Each connection runs in a context of its own
+            seen.append((data, var.get()))
+            var.set(data)
+
+        def eof_received(self):
+            seen.append(("eof", var.get()))
+
+    async def run():
+        server = await glib_loop.create_server(Protocol, "127.0.0.1", 0)
+        for data in [b"A", b"B"]:
+            _, writer = await asyncio.open_connection(*server.sockets[0].getsockname())
+            writer.write(data)
+            await asyncio.sleep(0.01)
+            writer.write_eof()
+            await asyncio.sleep(0.01)
+            writer.close()
+        server.close()
+        await server.wait_closed()
+
+    glib_loop.run_until_complete(run())
+    assert seen == [
+        ("factory", None),
+        (b"A", "factory"),
+        ("eof", b"A"),
+        ("factory", None),
+        (b"B", "factory"),
+        ("eof", b"B"),
+    ]
+    assert var.get() is None
+
+
+@transport_engines
+def test_socket_transport_buffered_protocol(glib_loop):
+    rsock, wsock = socket.socketpair()
+    received = bytearray()
+
+    class Protocol(asyncio.BufferedProtocol):
+        def get_buffer(self, sizehint):
+            self.buffer = bytearray(sizehint)
+            return self.buffer
+
+        def buffer_updated(self, nbytes):
+            received.extend(self.buffer[:nbytes])
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(Protocol, rsock)
+        wsock.sendall(b"buffered data")
+        await asyncio.sleep(0.01)
+        assert received == b"buffered data"
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+
+@pytest.mark.parametrize(
+    "failing, message",
+    [
+        ("get_buffer", "get_buffer() call failed"),
+        ("empty_buffer", "get_buffer() call failed"),
+        ("buffer_updated", "buffer_updated() call failed"),
+        ("data_received", "data_received() call failed"),
+        ("eof_received", "eof_received() call failed"),
+    ],
+)
+def test_socket_transport_protocol_error(glib_loop, failing, message):
+    rsock, wsock = socket.socketpair()
+    errors = []
+    glib_loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+    class Protocol(asyncio.BufferedProtocol):
+        def get_buffer(self, sizehint):
+            if failing == "get_buffer":
+                raise ZeroDivisionError
+            return bytearray(0 if failing == "empty_buffer" else sizehint)
+
+        def buffer_updated(self, nbytes):
+            if failing == "buffer_updated":
+                raise ZeroDivisionError
+
+        def eof_received(self):
+            if failing == "eof_received":
+                raise ZeroDivisionError
+
+    class StreamProtocol(asyncio.Protocol):
+        def data_received(self, data):
+            raise ZeroDivisionError
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(
+            StreamProtocol if failing == "data_received" else Protocol, rsock
+        )
+        if failing == "eof_received":
+            wsock.shutdown(socket.SHUT_WR)
+        else:
+            wsock.sendall(b"data")
+        await asyncio.sleep(0.05)
+
+        # The transport is closed after the first failure, rather than
+        # failing again for as long as the data is left in the socket
+        assert transport._closed
+        assert transport._sock is None
+        assert transport._read_handle is None
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+    assert len(errors) == 1
+    assert message in errors[0]["message"]
+    if failing == "empty_buffer":
+        assert isinstance(errors[0]["exception"], RuntimeError)
+    else:
+        assert isinstance(errors[0]["exception"], ZeroDivisionError)
+
+
+@pytest.mark.parametrize(
+    "budget, wakeups",
+    [
+        ({}, 8),
+        ({"max_reads": 2}, 4),
+        ({"max_reads": None, "max_bytes": 4 * 8192}, 2),
+        ({"max_reads": None}, 1),
+    ],
+)
+def test_socket_transport_read_budget(glib_loop, budget, wakeups):
+    rsock, wsock = socket.socketpair()
+    calls = 0
+
+    async def run():
+        nonlocal calls
+
+        transport, protocol = await glib_loop.connect_accepted_socket(
+            RecordingProtocol, rsock
+        )
+        transport.set_read_budget(**budget)
+        transport.set_read_size(transport.max_size)
+
+        # Queue up 8 reads worth of data while no watch is attached
+        transport.pause_reading()
+        wsock.sendall(b"x" * 8 * transport.max_size)
+
+        read_ready = transport._read_ready
+
+        def counting_read_ready():
+            nonlocal calls
+            calls += 1
+            read_ready()
+
+        transport._read_ready = counting_read_ready
+        transport.resume_reading()
+        while len(protocol.data) < 8 * transport.max_size:
+            await asyncio.sleep(0.01)
+
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+    assert calls == wakeups
+
+
+def test_socket_transport_read_budget_invalid(glib_loop):
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(RecordingProtocol, rsock)
+        with pytest.raises(ValueError):
+            transport.set_read_budget(max_reads=0)
+        with pytest.raises(ValueError):
+            transport.set_read_budget(max_bytes=0)
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+
+def test_socket_transport_adaptive_read_size(glib_loop):
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, protocol = await glib_loop.connect_accepted_socket(
+            RecordingProtocol, rsock
+        )
+        assert transport.get_extra_info("read_size") == transport.max_size
+
+        # Reads that fill the buffer make it grow
+        transport.set_read_budget(max_reads=None)
+        sender = threading.Thread(target=wsock.sendall, args=(b"x" * 1024 * 1024,))
+        sender.start()
+        while len(protocol.data) < 1024 * 1024:
+            await asyncio.sleep(0.01)
+        sender.join()
+        assert transport.get_extra_info("read_size") > transport.max_size
+
+        # Small reads make it shrink, down to the lower bound
+        for _ in range(100):
+            wsock.sendall(b"x")
+            await asyncio.sleep(0.001)
+        assert transport.get_extra_info("read_size") == transport.min_read_size
+
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+
+def test_socket_transport_set_read_size(glib_loop):
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, protocol = await glib_loop.connect_accepted_socket(
+            RecordingProtocol, rsock
+        )
+        transport.set_read_size(100)
+        assert transport.get_extra_info("read_size") == 100
+
+        transport.set_read_budget(max_reads=None)
+        wsock.sendall(b"x" * 10000)
+        while len(protocol.data) < 10000:
+            await asyncio.sleep(0.01)
+        assert transport.get_extra_info("read_size") == 100
+
+        transport.set_read_size(None)
+        assert transport.get_extra_info("read_size") == transport.max_size
+
+        with pytest.raises(ValueError):
+            transport.set_read_size(0)
+
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+
+
+def recv_all(sock):
+    data = bytearray()
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return bytes(data)
+        data += chunk
+
+
+@transport_engines
+def test_socket_transport_write_queue(glib_loop):
+    from gbulb.transports import SocketTransport
+
+    rsock, wsock = socket.socketpair()
+    payload = os.urandom(4 * 1024 * 1024)
+    mutable = bytearray(b"mutable")
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(asyncio.Protocol, wsock)
+        transport.set_write_buffer_limits(high=64 * 1024 * 1024)
+        watched = isinstance(transport, SocketTransport)
+        assert transport.can_write_eof()
+
+        # More than fits into the socket buffer, so that the rest gets queued
+        transport.write(payload)
+        if watched:
+            assert transport.get_write_buffer_size() > 0
+            assert transport._write_buffer[0].obj is payload
+
+        # Mutable data is copied when queued
+        transport.write(mutable)
+        mutable[:] = b"changed"
+
+        transport.writelines([b"a", b"", memoryview(b"bc"), bytearray(b"d")])
+        if watched:
+            assert transport.get_write_buffer_size() == sum(
+                len(data) for data in transport._write_buffer
+            )
+        transport.write_eof()
+        with pytest.raises(RuntimeError):
+            transport.write(b"too late")
+
+        reader = glib_loop.run_in_executor(None, recv_all, rsock)
+        assert await reader == payload + b"mutableabcd"
+        assert transport.get_write_buffer_size() == 0
+        if watched:
+            assert transport._write_handle is None
+
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        rsock.close()
+
+
+@skipIf(not hasattr(socket.socket, "sendmsg"), "sendmsg() is not available")
+def test_socket_transport_writelines(glib_loop):
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(asyncio.Protocol, wsock)
+
+        with mock.patch.object(transport, "_sock", mock.Mock(wraps=wsock)) as sock:
+            transport.writelines([b"x" * 100] * 50)
+        assert sock.sendmsg.call_count == 1
+        assert sock.send.call_count == 0
+        assert transport.get_write_buffer_size() == 0
+
+        transport.close()
+        assert await glib_loop.run_in_executor(None, recv_all, rsock) == (b"x" * 5000)
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        rsock.close()
+
+
+def test_socket_transport_write_coalescing(glib_loop):
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(asyncio.Protocol, wsock)
+
+        # The first write is sent right away, the following ones are queued
+        # until the loop comes around again
+        transport.write(b"a")
+        assert transport.get_write_buffer_size() == 0
+        transport.write(b"b")
+        transport.write(b"c")
+        assert transport.get_write_buffer_size() == 2
+        assert len(transport._write_buffer) == 1
+
+        await asyncio.sleep(0)
+        assert transport.get_write_buffer_size() == 0
+
+        # Closing waits for queued data to be sent
+        transport.write(b"d")
+        transport.write(b"e")
+        transport.close()
+
+        assert await glib_loop.run_in_executor(None, recv_all, rsock) == b"abcde"
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        rsock.close()
+
+
+@skipIf(not hasattr(socket.socket, "sendmsg"), "sendmsg() is not available")
+def test_socket_transport_auto_cork(glib_loop):
+    rsock, wsock = socket.socketpair()
+
+    async def run():
+        transport, _ = await glib_loop.connect_accepted_socket(asyncio.Protocol, wsock)
+        transport.set_auto_cork()
+
+        with mock.patch.object(transport, "_sock", mock.Mock(wraps=wsock)) as sock:
+            # Nothing is sent until the loop comes around again, and then
+            # everything is sent at once
+            transport.write(b"header")
+            transport.writelines([b"a", b"b"])
+            transport.write(b"x" * 100000)
+            assert transport.get_write_buffer_size() == 100008
+            assert sock.send.call_count == 0
+            assert sock.sendmsg.call_count == 0
+
+            await asyncio.sleep(0)
+            assert sock.sendmsg.call_count == 1
+            assert sock.send.call_count == 0
+
+            # Without auto-corking, the first write is sent right away
+            transport.set_auto_cork(False)
+            transport.write(b"c")
+            assert sock.send.call_count == 1
+            assert transport.get_write_buffer_size() == 0
+            await asyncio.sleep(0)
+
+            # Closing waits for corked data to be sent
+            transport.set_auto_cork(True)
+            transport.writelines([b"d", b"e"])
+            assert transport.get_write_buffer_size() == 2
+            transport.close()
+
+        reader = glib_loop.run_in_executor(None, recv_all, rsock)
+        assert await reader == b"headerab" + b"x" * 100000 + b"cde"
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        rsock.close()
+
+
+def test_server_accept_batches(glib_loop):
+    connections = []
+
+    class Protocol(asyncio.Protocol):
+        def connection_made(self, transport):
+            connections.append(transport)
+
+    async def run():
+        with mock.patch.object(
+            glib_loop, "_accept_connections", wraps=glib_loop._accept_connections
+        ) as accept:
+            server = await glib_loop.create_server(Protocol, "127.0.0.1", 0)
+            addr = server.sockets[0].getsockname()
+
+            # All pending connections are accepted at once
+            clients = [socket.create_connection(addr) for _ in range(10)]
+            while len(connections) < 10:
+                await asyncio.sleep(0.01)
+            assert accept.call_count == 1
+
+        for transport in connections:
+            transport.close()
+        for client in clients:
+            client.close()
+        server.close()
+        await server.wait_closed()
+
+    glib_loop.run_until_complete(run())
+
+
+def test_server_max_connections(glib_loop):
+    connections = []
+
+    class Protocol(asyncio.Protocol):
+        def connection_made(self, transport):
+            connections.append(transport)
+
+    async def wait_for_connections(count):
+        while len(connections) < count:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        assert len(connections) == count
+
+    async def run():
+        server = await glib_loop.create_server(
+            Protocol, "127.0.0.1", 0, max_connections=2
+        )
+        addr = server.sockets[0].getsockname()
+
+        # The third connection waits until one of the first two is closed
+        clients = [socket.create_connection(addr) for _ in range(3)]
+        await wait_for_connections(2)
+        assert not glib_loop._accept_handles
+
+        connections[0].close()
+        await wait_for_connections(3)
+
+        for transport in connections:
+            transport.close()
+        for client in clients:
+            client.close()
+        server.close()
+        await server.wait_closed()
+
+    glib_loop.run_until_complete(run())
+
+
+def test_server_accept_out_of_resources(glib_loop):
+    import errno
+
+    errors = []
+    glib_loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+    class Protocol(asyncio.Protocol):
+        def connection_made(self, transport):
+            transport.write(b"hello")
+            transport.close()
+
+    async def run():
+        server = await glib_loop.create_server(Protocol, "127.0.0.1", 0)
+        addr = server.sockets[0].getsockname()
+
+        with mock.patch.object(
+            socket.socket, "accept", side_effect=OSError(errno.EMFILE, "Too many")
+        ), mock.patch.object(asyncio.constants, "ACCEPT_RETRY_DELAY", 0.1):
+            client = socket.create_connection(addr, timeout=5)
+            await asyncio.sleep(0.05)
+
+        # Accepting stops for a while, but the server keeps serving
+        assert len(errors) == 1
+        assert isinstance(errors[0]["exception"], OSError)
+        assert not glib_loop._accept_handles
+        assert server.is_serving()
+
+        # The pending connection is accepted once accepting resumes
+        with client:
+            assert await glib_loop.run_in_executor(None, client.recv, 5) == b"hello"
+        server.close()
+        await server.wait_closed()
+
+    glib_loop.run_until_complete(run())
+
+
+def test_server_max_connections_invalid(glib_loop):
+    with pytest.raises(ValueError):
+        glib_loop.run_until_complete(
+            glib_loop.create_server(asyncio.Protocol, "127.0.0.1", 0, max_connections=0)
+        )
+
+
+@skipIf(not hasattr(os, "sendfile"), "os.sendfile() is not available")
+def test_sock_sendfile(glib_loop):
+    rsock, wsock = socket.socketpair()
+    wsock.setblocking(False)
+    payload = os.urandom(4 * 1024 * 1024)
+
+    async def run(file):
+        reader = glib_loop.run_in_executor(None, recv_all, rsock)
+        with mock.patch.object(
+            glib_loop, "_sock_sendfile_fallback", side_effect=AssertionError
+        ):
+            sent = await glib_loop.sock_sendfile(wsock, file, 1000, len(payload) - 2000)
+        wsock.close()
+        return sent, await reader
+
+    try:
+        with tempfile.TemporaryFile() as file:
+            file.write(payload)
+            file.seek(0)
+            sent, received = glib_loop.run_until_complete(run(file))
+            assert file.tell() == len(payload) - 1000
+    finally:
+        rsock.close()
+    assert sent == len(payload) - 2000
+    assert received == payload[1000:-1000]
+
+
+@skipIf(not hasattr(os, "sendfile"), "os.sendfile() is not available")
+def test_socket_transport_sendfile(glib_loop):
+    rsock, wsock = socket.socketpair()
+    payload = os.urandom(4 * 1024 * 1024)
+
+    async def run(file):
+        reader = glib_loop.run_in_executor(None, recv_all, rsock)
+        transport, protocol = await glib_loop.connect_accepted_socket(
+            RecordingProtocol, wsock
+        )
+
+        # Data written before and after the file is sent in order
+        transport.write(b"header" * 100000)
+        with mock.patch.object(
+            glib_loop, "_sendfile_fallback", side_effect=AssertionError
+        ):
+            sendfile = asyncio.ensure_future(glib_loop.sendfile(transport, file))
+            await asyncio.sleep(0)
+            with pytest.raises(RuntimeError, match="sendfile is in progress"):
+                transport.write(b"too early")
+            assert await sendfile == len(payload)
+        assert transport.is_reading()
+        transport.write(b"trailer")
+        transport.close()
+        return await reader
+
+    try:
+        with tempfile.TemporaryFile() as file:
+            file.write(payload)
+            file.seek(0)
+            received = glib_loop.run_until_complete(run(file))
+    finally:
+        rsock.close()
+    assert received == b"header" * 100000 + payload + b"trailer"
+
+
+@transport_engines
+@pytest.mark.parametrize("paused", [False, True])
+def test_socket_transport_sendfile_any_engine(glib_loop, paused):
+    rsock, wsock = socket.socketpair()
+    payload = os.urandom(1024 * 1024)
+
+    async def run(file):
+        reader = glib_loop.run_in_executor(None, recv_all, rsock)
+        transport, _ = await glib_loop.connect_accepted_socket(asyncio.Protocol, wsock)
+        if paused:
+            transport.pause_reading()
+        transport.write(b"header")
+        assert await glib_loop.sendfile(transport, file) == len(payload)
+        # Reading is only resumed if it was paused for sending the file
+        assert transport.is_reading() is not paused
+        transport.write(b"trailer")
+        transport.close()
+        return await reader
+
+    try:
+        with tempfile.TemporaryFile() as file:
+            file.write(payload)
+            file.seek(0)
+            received = glib_loop.run_until_complete(run(file))
+    finally:
+        rsock.close()
+    assert received == b"header" + payload + b"trailer"
+
+
+class DatagramRecorder(asyncio.DatagramProtocol):
+    def __init__(self, count):
+        self.datagrams = []
+        self.batches = []
+        self.count = count
+        self.done = asyncio.Event()
+
+    def datagram_received(self, data, addr):
+        self.datagrams.append(data)
+        if len(self.datagrams) == self.count:
+            self.done.set()
+
+
+class BatchDatagramRecorder(DatagramRecorder):
+    def datagrams_received(self, batch):
+        self.batches.append(len(batch))
+        for data, addr in batch:
+            self.datagram_received(data, addr)
+
+
+@skipIf(is_windows, "Unix sockets are not supported on Windows")
+@pytest.mark.parametrize(
+    "protocol_class, budget, batches",
+    [
+        (DatagramRecorder, {"max_reads": 4}, []),
+        (BatchDatagramRecorder, {"max_reads": 4}, [4] * 25),
+        # Batches are read 64 datagrams at a time by default
+        (BatchDatagramRecorder, None, [64, 36]),
+        (DatagramRecorder, None, []),
+    ],
+)
+def test_datagram_transport_read_budget(glib_loop, protocol_class, budget, batches):
+    rsock, wsock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    for i in range(100):
+        wsock.send(b"%d" % i)
+
+    async def run():
+        protocol = protocol_class(100)
+        protocol.done._loop = glib_loop
+        transport, _ = await glib_loop.create_datagram_endpoint(
+            lambda: protocol, sock=rsock
+        )
+        if budget is not None:
+            transport.set_read_budget(**budget)
+        elif protocol_class is DatagramRecorder:
+            assert transport.max_reads == 1
+        await asyncio.wait_for(protocol.done.wait(), timeout=5)
+        transport.close()
+        return protocol
+
+    try:
+        protocol = glib_loop.run_until_complete(run())
+    finally:
+        wsock.close()
+    assert protocol.datagrams == [b"%d" % i for i in range(100)]
+    assert protocol.batches == batches
+
+
+def test_datagram_transport_write_eof(glib_loop):
+    class Protocol(asyncio.DatagramProtocol):
+        def __init__(self):
+            self.closed = glib_loop.create_future()
+
+        def connection_lost(self, exc):
+            self.closed.set_result(exc)
+
+    async def run():
+        transport, protocol = await glib_loop.create_datagram_endpoint(
+            Protocol, local_addr=("127.0.0.1", 0)
+        )
+        assert not transport.can_write_eof()
+
+        # Datagram sockets can't be shut down for writing: they get closed
+        transport.write_eof()
+        assert transport.is_closing()
+        assert await protocol.closed is None
+
+    glib_loop.run_until_complete(run())
+
+
+@skipIf(is_windows, "Unix sockets are not supported on Windows")
+def test_datagram_transport_write_queue(glib_loop):
+    rsock, wsock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    rsock.setblocking(False)
+    datagrams = [os.urandom(1024) for _ in range(1000)]
+
+    async def run():
+        transport, _ = await glib_loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, sock=wsock
+        )
+
+        # The peer is not reading yet, so the socket fills up at some point
+        # and the remaining datagrams get queued
+        for data in datagrams:
+            transport.sendto(data)
+        assert transport.get_write_buffer_size() > 0
+        transport.close()
+
+        received = []
+        while len(received) < len(datagrams):
+            try:
+                received.append(rsock.recv(2048))
+            except BlockingIOError:
+                await asyncio.sleep(0.001)
+        return received
+
+    try:
+        assert glib_loop.run_until_complete(run()) == datagrams
+    finally:
+        rsock.close()
+
+
+@skipIf(is_windows, "Unix sockets are not supported on Windows")
+def test_datagram_transport_flow_control(glib_loop):
+    rsock, wsock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+    rsock.setblocking(False)
+    events = []
+
+    class Protocol(asyncio.DatagramProtocol):
+        def pause_writing(self):
+            events.append("pause")
+
+        def resume_writing(self):
+            events.append("resume")
+
+    async def run():
+        transport, _ = await glib_loop.create_datagram_endpoint(Protocol, sock=wsock)
+        transport.set_write_buffer_limits(high=4096)
+
+        # Fill the socket up, so that the datagrams below get queued
+        data = b"x" * 1024
+        while transport.get_write_buffer_size() == 0:
+            transport.sendto(data)
+        assert transport.get_write_buffer_size() == 1024
+        assert events == []
+
+        # Immutable datagrams are queued without being copied
+        view = memoryview(b"y" * 1024)
+        buf = bytearray(b"z" * 1024)
+        transport.sendto(data)
+        transport.sendto(view)
+        transport.sendto(buf)
+        queued = [data for data, addr in transport._write_buffer]
+        assert queued[1] is data
+        assert queued[2].obj is view.obj
+        assert queued[3] == buf and queued[3] is not buf
+
+        # The limit is in bytes, not datagrams
+        assert transport.get_write_buffer_size() == 4 * 1024
+        assert events == []
+        transport.sendto(b"w")
+        assert transport.get_write_buffer_size() == 4 * 1024 + 1
+        assert events == ["pause"]
+
+        while events == ["pause"]:
+            try:
+                rsock.recv(2048)
+            except BlockingIOError:
+                await asyncio.sleep(0.001)
+        assert events == ["pause", "resume"]
+        transport.close()
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        rsock.close()
+
+
+def test_datagram_transport_udp(glib_loop):
+    async def run():
+        server = DatagramRecorder(3)
+        server.done._loop = glib_loop
+        server_transport, _ = await glib_loop.create_datagram_endpoint(
+            lambda: server, local_addr=("127.0.0.1", 0)
+        )
+        addr = server_transport.get_extra_info("sockname")
+
+        client_transport, _ = await glib_loop.create_datagram_endpoint(
+            asyncio.DatagramProtocol, remote_addr=addr
+        )
+        for data in [b"a", b"bb", bytearray(b"ccc")]:
+            client_transport.sendto(data)
+        await asyncio.wait_for(server.done.wait(), timeout=5)
+
+        client_transport.close()
+        server_transport.close()
+        return server.datagrams
+
+    assert glib_loop.run_until_complete(run()) == [b"a", b"bb", b"ccc"]
+
+
+@pytest.mark.parametrize("payload_type", [bytes, bytearray])
+def test_channel_write_partial(glib_loop, payload_type):
+    rsock, wsock = socket.socketpair()
+    rsock.setblocking(False)
+    wsock.setblocking(False)
+    payload = payload_type(os.urandom(256 * 1024))
+    writes = []
+
+    def write_func(channel, buf):
+        # Only ever write a little, and check that no copies are made (but
+        # for a single one of the rest of a mutable buffer)
+        writes.append(buf.obj)
+        return wsock.send(buf[:1000])
+
+    async def run():
+        channel = glib_loop._channel_from_socket(wsock)
+        future = glib_loop._channel_write(channel, payload, write_func)
+
+        received = bytearray()
+        while len(received) < len(payload):
+            await asyncio.sleep(0.001)
+            try:
+                received += rsock.recv(65536)
+            except BlockingIOError:
+                pass
+
+        assert await future == len(payload)
+        assert received == payload
+        assert len(writes) > 1
+        assert writes[0] is payload
+        if payload_type is bytes:
+            assert all(obj is payload for obj in writes)
+        else:
+            assert all(obj is writes[1] for obj in writes[1:])
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        rsock.close()
+        wsock.close()
+
+
+def test_sock_sendall_large(glib_loop):
+    rsock, wsock = socket.socketpair()
+    wsock.setblocking(False)
+    payload = os.urandom(8 * 1024 * 1024)
+
+    async def run():
+        reader = glib_loop.run_in_executor(None, recv_all, rsock)
+        await glib_loop.sock_sendall(wsock, payload)
+        wsock.close()
+        assert await reader == payload
+
+    try:
+        glib_loop.run_until_complete(run())
+    finally:
+        rsock.close()
+
+
+@skipIf(is_windows, "Pipes are not supported on Windows")
+def test_write_pipe_large(glib_loop):
+    rfd, wfd = os.pipe()
+    payload = os.urandom(4 * 1024 * 1024)
+
+    def read_all():
+        data = bytearray()
+        with open(rfd, "rb", buffering=0) as pipe:
+            while True:
+                chunk = pipe.read(65536)
+                if not chunk:
+                    return bytes(data)
+                data += chunk
+
+    async def run():
+        reader = glib_loop.run_in_executor(None, read_all)
+        with mock.patch.object(
+            GLib.IOChannel, "write", side_effect=AssertionError("copying write")
+        ):
+            transport, _ = await glib_loop.connect_write_pipe(asyncio.Protocol, wfd)
+            transport.write(payload)
+            transport.close()
+            assert await reader == payload
+
+    glib_loop.run_until_complete(run())
+
+
+@skipIf(is_windows, "Pipes are not supported on Windows")
+def test_write_pipe_reused_buffer(glib_loop):
+    rfd, wfd = os.pipe()
+    payload = os.urandom(1024 * 1024)
+
+    def read_all():
+        data = bytearray()
+        with open(rfd, "rb", buffering=0) as pipe:
+            while True:
+                chunk = pipe.read(65536)
+                if not chunk:
+                    return bytes(data)
+                data += chunk
+
+    async def run():
+        transport, _ = await glib_loop.connect_write_pipe(asyncio.Protocol, wfd)
+        # The buffer is too large to be written in one go, and it is changed
+        # and resized right after it has been handed over
+        buf = bytearray(payload)
+        transport.write(buf)
+        buf[:] = bytes(len(payload))
+        buf.extend(b"more")
+        transport.close()
+        assert await glib_loop.run_in_executor(None, read_all) == payload
+
+    glib_loop.run_until_complete(run())
+
+
+@skipIf(is_windows, "Pipes are not supported on Windows")
+def test_read_pipe_buffered_protocol(glib_loop):
+    rfd, wfd = os.pipe()
+    received = bytearray()
+    done = asyncio.Event()
+    done._loop = glib_loop
+
+    class Protocol(asyncio.BufferedProtocol):
+        def get_buffer(self, sizehint):
+            self.buffer = bytearray(sizehint)
+            return self.buffer
+
+        def buffer_updated(self, nbytes):
+            received.extend(self.buffer[:nbytes])
+
+        def eof_received(self):
+            done.set()
+
+    async def run():
+        with mock.patch.object(
+            GLib.IOChannel, "read", side_effect=AssertionError("copying read")
+        ):
+            transport, _ = await glib_loop.connect_read_pipe(Protocol, rfd)
+            os.write(wfd, b"buffered ")
+            await asyncio.sleep(0.01)
+            os.write(wfd, b"pipe data")
+            os.close(wfd)
+            await asyncio.wait_for(done.wait(), timeout=5)
+        transport.close()
+
+    glib_loop.run_until_complete(run())
+    assert received == b"buffered pipe data"
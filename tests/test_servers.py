@@ -0,0 +1,248 @@
+import asyncio
+import os
+import signal
+import socket
+
+import pytest
+
+reuse_port = pytest.mark.skipif(
+    not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT is not available"
+)
+fork = pytest.mark.skipif(not hasattr(os, "fork"), reason="fork() is not available")
+
+
+class Greeter(asyncio.Protocol):
+    def connection_made(self, transport):
+        transport.write(b"hello")
+        self.transport = transport
+
+    def data_received(self, data):
+        self.transport.close()
+
+
+def greet(address):
+    with socket.create_connection(address, timeout=5) as sock:
+        assert sock.recv(5) == b"hello"
+        sock.sendall(b"bye")
+        assert sock.recv(1) == b""
+
+
+@reuse_port
+@pytest.mark.parametrize("processes", [False, True])
+def test_multi_loop_server(processes):
+    from gbulb import MultiLoopServer
+
+    with MultiLoopServer(
+        Greeter, "127.0.0.1", 0, workers=2, processes=processes
+    ) as server:
+        host, port = server.address
+        assert port != 0
+        for _ in range(20):
+            greet(server.address)
+
+        stats = server.stats()
+        assert stats["accepted"] == 20
+        assert len(stats["workers"]) == 2
+        assert sum(worker["accepted"] for worker in stats["workers"]) == 20
+
+    # All connections have been closed by the time the server has stopped
+    assert server.stats()["active"] == 0
+
+
+@reuse_port
+def test_multi_loop_server_stop_timeout():
+    from gbulb import MultiLoopServer
+
+    server = MultiLoopServer(Greeter, "127.0.0.1", 0, workers=2)
+    server.start()
+    with socket.create_connection(server.address, timeout=5) as sock:
+        assert sock.recv(5) == b"hello"
+        assert server.stats()["active"] == 1
+
+        # The open connection is aborted once the timeout has passed
+        server.stop(timeout=0.01)
+        assert sock.recv(1) == b""
+    stats = server.stats()
+    assert stats["accepted"] == 1
+    assert stats["active"] == 0
+
+    # Nothing is listening anymore
+    with pytest.raises(ConnectionRefusedError):
+        socket.create_connection(server.address, timeout=5)
+
+
+@reuse_port
+def test_multi_loop_server_startup_error():
+    from gbulb import MultiLoopServer
+
+    # A socket without SO_REUSEPORT keeps the workers from binding the port
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        sock.listen()
+        server = MultiLoopServer(Greeter, *sock.getsockname(), workers=2)
+        with pytest.raises(OSError):
+            server.start()
+    assert server.stats()["accepted"] == 0
+
+
+def test_multi_loop_server_invalid():
+    from gbulb import MultiLoopServer
+
+    with pytest.raises(ValueError):
+        MultiLoopServer(Greeter, workers=0)
+
+
+@reuse_port
+def test_multi_loop_server_already_started():
+    from gbulb import MultiLoopServer
+
+    with MultiLoopServer(Greeter, "127.0.0.1", 0, workers=1) as server:
+        with pytest.raises(RuntimeError):
+            server.start()
+
+
+@fork
+def test_prefork_server(glib_loop):
+    from gbulb import PreforkServer
+
+    async def run():
+        server = PreforkServer(Greeter, "127.0.0.1", 0, workers=2)
+        async with server:
+            pids = list(server._workers)
+            assert len(set(pids)) == 2
+            for _ in range(20):
+                await glib_loop.run_in_executor(None, greet, server.address)
+
+            stats = server.stats()
+            assert stats["accepted"] == 20
+            assert len(stats["workers"]) == 2
+
+        assert server.stats()["active"] == 0
+        for pid in pids:
+            with pytest.raises(ProcessLookupError):
+                os.kill(pid, 0)
+        with pytest.raises(ConnectionRefusedError):
+            socket.create_connection(server.address, timeout=5)
+
+    glib_loop.run_until_complete(run())
+
+
+@fork
+def test_prefork_server_restarts_crashed_worker(glib_loop):
+    from gbulb import PreforkServer
+
+    errors = []
+    pids = []
+    glib_loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+    async def run():
+        async with PreforkServer(
+            Greeter, "127.0.0.1", 0, workers=2, restart_delay=0.01
+        ) as server:
+            pid = server._workers[0]
+            pids.append(pid)
+            os.kill(pid, signal.SIGKILL)
+            for _ in range(500):
+                if server._workers[0] not in (None, pid):
+                    break
+                await asyncio.sleep(0.01)
+            assert server._workers[0] not in (None, pid)
+
+            for _ in range(10):
+                await glib_loop.run_in_executor(None, greet, server.address)
+
+    glib_loop.run_until_complete(run())
+    assert len(errors) == 1
+    assert f"(pid {pids[0]}) exited with status -9" in errors[0]["message"]
+
+
+@fork
+def test_prefork_server_rolling_restart(glib_loop):
+    from gbulb import PreforkServer
+
+    async def run():
+        async with PreforkServer(Greeter, "127.0.0.1", 0, workers=1) as server:
+            pid = server._workers[0]
+            with socket.create_connection(server.address, timeout=5) as sock:
+                assert sock.recv(5) == b"hello"
+
+                # The old worker waits for its open connection to be closed,
+                # while the new one already serves the socket
+                restart = asyncio.ensure_future(server.restart())
+                while server._workers[0] == pid:
+                    await asyncio.sleep(0.01)
+                await glib_loop.run_in_executor(None, greet, server.address)
+                assert not restart.done()
+                assert len(server._exits) == 2
+
+                sock.sendall(b"bye")
+                await asyncio.wait_for(restart, 10)
+
+            assert list(server._exits) == server._workers
+
+            # The worker counts the connection as closed only after the
+            # client has seen it close
+            for _ in range(500):
+                if server.stats()["active"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert server.stats() == {
+                "accepted": 2,
+                "active": 0,
+                "workers": [{"accepted": 2, "active": 0}],
+            }
+
+    glib_loop.run_until_complete(run())
+
+
+@fork
+def test_prefork_server_sigterm(glib_loop):
+    from gbulb import PreforkServer
+
+    async def run():
+        server = PreforkServer(Greeter, "127.0.0.1", 0, workers=1)
+        await server.start()
+        glib_loop.call_later(0.01, os.kill, os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(server.serve_forever(), 10)
+        assert not server._exits
+
+    glib_loop.run_until_complete(run())
+
+
+@fork
+def test_prefork_server_startup_error(glib_loop):
+    from gbulb import PreforkServer
+
+    async def run():
+        # The workers can't create a server on a socket that isn't a stream
+        with socket.socket(type=socket.SOCK_DGRAM) as sock:
+            server = PreforkServer(Greeter, sock=sock, workers=2)
+            with pytest.raises(ValueError):
+                await server.start()
+            assert not server._exits
+
+    glib_loop.run_until_complete(run())
+
+
+def test_prefork_server_invalid():
+    from gi.repository import GLib
+
+    from gbulb import GLibEventLoop, PreforkServer
+
+    with pytest.raises(ValueError):
+        PreforkServer(Greeter, workers=0)
+    with socket.socket() as sock:
+        with pytest.raises(ValueError):
+            PreforkServer(Greeter, "127.0.0.1", sock=sock)
+
+    async def run():
+        server = PreforkServer(Greeter, "127.0.0.1", 0)
+        with pytest.raises(RuntimeError):
+            await server.start()
+
+    # Child processes are only watched on the global default context
+    loop = GLibEventLoop(context=GLib.MainContext())
+    try:
+        loop.run_until_complete(run())
+    finally:
+        loop.close()